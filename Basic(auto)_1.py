@@ -5,12 +5,12 @@ from Basic_1 import (
     cnot_on_n_qubits,
     toffoli_on_n_qubits,
     H, X, Y, Z,
-    n
 )
 
 def main():
     gates = ["H", "X", "Y", "Z", "CNOT", "TOFFOLI"]
     print('hello from meow meow quantum')
+    n = int(input("Number of qubits: "))
     # initialize |00...0⟩
     s = zero_state(n)
 
@@ -1,7 +1,34 @@
 # quantum_simulator.py
 import numpy as np
+from operator_cache import operator_cache
+from sparse_ops import SparseOperator, sparse_gate_on_n_qubits, sparse_controlled_x
+from sampler import ShotSampler, counts_to_dict
 
 
+# Numeric precision of the state vectors: complex128 ("double") or complex64 ("single").
+# Gate constants stay complex128 and are cast to the state's dtype where they are applied.
+PRECISIONS = {"double": np.complex128, "single": np.complex64}
+default_dtype = np.complex128
+
+def precision_dtype(precision=None):
+    """dtype for a precision name; None gives the global default"""
+    if precision is None:
+        return default_dtype
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {list(PRECISIONS)}")
+    return PRECISIONS[precision]
+
+def set_precision(precision):
+    """Set the global default precision used by zero_state and new Circuits"""
+    global default_dtype
+    default_dtype = precision_dtype(precision)
+
+# Cast a gate matrix to the precision of the state it acts on
+def match_precision(gate, state):
+    if state.dtype == np.complex64:
+        return gate.astype(np.complex64, copy=False)
+    return gate
+
 # Basic single-qubit states
 zero = np.array([[1.0], [0.0]], dtype=complex)
 one  = np.array([[0.0], [1.0]], dtype=complex)
@@ -13,10 +40,9 @@ def normalize(state):
         raise ValueError("Zero vector can't be normalized")
     return state / float(norm)
 # Create an n-qubit zero state |00...0>
-def zero_state(n):
-    state = zero
-    for _ in range(n-1):
-        state = np.kron(state, zero)
+def zero_state(n, dtype=None):
+    state = np.zeros((2**n, 1), dtype=dtype or default_dtype)
+    state[0, 0] = 1.0
     return state
 
 # Tensor (Kronecker) product helper for lists
@@ -44,8 +70,15 @@ H = (1/np.sqrt(2)) * np.array([[1,  1],
 # 2x2 identity
 I = np.eye(2, dtype=complex)
 
+# Single-qubit gates by the names used in Circuit.diagram
+GATES = {"H": H, "X": X, "Y": Y, "Z": Z}
+
 # Build an n-qubit operator that applies `gate` to target_qubit (0 = leftmost / most significant)
 def gate_on_n_qubits(gate, target_qubit, n_qubits):
+    key = (gate.tobytes(), (target_qubit,), (), n_qubits)
+    return operator_cache.get(key, lambda: _build_gate_on_n_qubits(gate, target_qubit, n_qubits))
+
+def _build_gate_on_n_qubits(gate, target_qubit, n_qubits):
     ops = []
     for i in range(n_qubits):
         if i == target_qubit:
@@ -56,58 +89,256 @@ def gate_on_n_qubits(gate, target_qubit, n_qubits):
 
 # Apply a single-qubit gate to the state (returns new state)
 def apply_single_qubit_gate(state, gate, target_qubit, n_qubits):
-    U = gate_on_n_qubits(gate, target_qubit, n_qubits)
-    return U @ state
+    """
+    Contract the 2x2 gate into the target axis only, O(2^n) instead of O(4^n).
+    The state is viewed as (left, 2, right) where the middle axis is the target
+    qubit, which is the (2,)*n tensor with the untouched axes grouped together.
+    A (batch, 2^n) array of row states works as well.
+    """
+    gate = match_precision(gate, state)
+    psi = state.reshape(-1, 2, 2**(n_qubits - target_qubit - 1))
+    if psi.shape[2] == 1:
+        # target is the last qubit: one (left, 2) @ (2, 2) product
+        out = psi[:, :, 0] @ gate.T
+    else:
+        out = gate @ psi
+    return out.reshape(state.shape)
+
+# Apply a k-qubit gate (2^k x 2^k, first target = most significant) to the state (returns new state)
+def apply_multi_qubit_gate(state, gate, targets, n_qubits):
+    """
+    Same contraction as apply_single_qubit_gate but over several axes of the
+    (2,)*n tensor. Trailing axes of `state` beyond the first are carried along,
+    so a (2^n, m) block of column vectors works too.
+    """
+    k = len(targets)
+    gate = match_precision(gate, state)
+    psi = state.reshape((2,) * n_qubits + state.shape[1:])
+    psi = np.moveaxis(psi, targets, range(k))
+    moved_shape = psi.shape
+    out = (gate @ psi.reshape(2**k, -1)).reshape(moved_shape)
+    out = np.moveaxis(out, range(k), targets)
+    return np.ascontiguousarray(out).reshape(state.shape)
+
+# Bit mask of a qubit inside a basis-state index (qubit 0 is the most significant bit)
+def qubit_mask(qubit, n_qubits):
+    return 1 << (n_qubits - 1 - qubit)
+
+# Basis-state permutation of an X on `target` controlled by every qubit in `controls`
+def controlled_x_permutation(controls, target, n_qubits):
+    idx = np.arange(2**n_qubits)
+    cmask = 0
+    for c in controls:
+        cmask |= qubit_mask(c, n_qubits)
+    flip = (idx & cmask) == cmask
+    return np.where(flip, idx ^ qubit_mask(target, n_qubits), idx)
+
+# Apply a multi-controlled X to the state (returns new state)
+def apply_controlled_x(state, controls, target, n_qubits):
+    """
+    Swap the target=0 and target=1 amplitudes of the slice where every control
+    is 1. Works on the (2,)*n view of the state, so no operator or index list is
+    built and any number of controls is supported. A (batch, 2^n) array of row
+    states works as well.
+    """
+    out = state.copy()
+    src = state.reshape((-1,) + (2,) * n_qubits)
+    dst = out.reshape((-1,) + (2,) * n_qubits)
+    idx0 = [slice(None)] * (n_qubits + 1)
+    for c in controls:
+        idx0[c + 1] = 1
+    idx1 = list(idx0)
+    idx0[target + 1] = 0
+    idx1[target + 1] = 1
+    dst[tuple(idx0)] = src[tuple(idx1)]
+    dst[tuple(idx1)] = src[tuple(idx0)]
+    return out
 
 # Controlled-NOT (control, target are indices; control=0 is leftmost qubit)
 def cnot_on_n_qubits(control, target, n_qubits):
-    dim = 2**n_qubits
-    U = np.zeros((dim, dim), dtype=complex)
-    # loop over basis states
-    for i in range(dim):
-        b = format(i, f'0{n_qubits}b')  # bitstring, leftmost is qubit 0
-        bits = list(map(int, b))
-        if bits[control] == 1:
-            # flip target bit
-            bits[target] ^= 1
-        j = int(''.join(map(str, bits)), 2)
-        U[j, i] = 1
-    return U
+    key = ("CNOT", (target,), (control,), n_qubits)
+    return operator_cache.get(key, lambda: _build_controlled_x([control], target, n_qubits))
+
 def toffoli_on_n_qubits(control1, control2, target, n_qubits):
+    key = ("TOFFOLI", (target,), (control1, control2), n_qubits)
+    return operator_cache.get(key, lambda: _build_controlled_x([control1, control2], target, n_qubits))
+
+def _build_controlled_x(controls, target, n_qubits):
     dim = 2**n_qubits
     U = np.zeros((dim, dim), dtype=complex)
-    # loop over basis states
-    for i in range(dim):
-        b = format(i, f'0{n_qubits}b')  # bitstring, leftmost is qubit 0
-        bits = list(map(int, b))
-        if bits[control1] == 1 and bits[control2] == 1:
-            # flip target bit
-            bits[target] ^= 1
-        j = int(''.join(map(str, bits)), 2)
-        U[j, i] = 1
+    U[controlled_x_permutation(controls, target, n_qubits), np.arange(dim)] = 1
     return U
 
+# Explicit operator of a gate from Circuit.diagram (cached)
+def gate_operator(gate, targets, controls, n_qubits, sparse=False, dtype=np.complex128):
+    """
+    Dense ndarray by default; sparse=True returns a sparse_ops.SparseOperator
+    that stores O(2^n) entries instead of O(4^n). dtype=np.complex64 gives
+    the single-precision operator (cached separately).
+    """
+    if dtype == np.complex64:
+        key = (("complex64", gate, sparse), tuple(targets), tuple(controls), n_qubits)
+        return operator_cache.get(key, lambda: _build_single_operator(gate, targets, controls, n_qubits, sparse))
+    if sparse:
+        key = (("sparse", gate), tuple(targets), tuple(controls), n_qubits)
+        return operator_cache.get(key, lambda: _build_sparse_operator(gate, targets, controls, n_qubits))
+    if gate in GATES:
+        return gate_on_n_qubits(GATES[gate], targets[0], n_qubits)
+    elif gate == "CNOT":
+        return cnot_on_n_qubits(controls[0], targets[0], n_qubits)
+    elif gate == "TOFFOLI":
+        return toffoli_on_n_qubits(controls[0], controls[1], targets[0], n_qubits)
+    raise ValueError(f"No operator for gate {gate}")
+
+def _build_single_operator(gate, targets, controls, n_qubits, sparse):
+    if sparse:
+        op = _build_sparse_operator(gate, targets, controls, n_qubits)
+        return SparseOperator(op.columns, op.values.astype(np.complex64))
+    if gate in GATES:
+        op = _build_gate_on_n_qubits(GATES[gate], targets[0], n_qubits)
+    elif gate in ["CNOT", "TOFFOLI"]:
+        op = _build_controlled_x(controls, targets[0], n_qubits)
+    else:
+        raise ValueError(f"No operator for gate {gate}")
+    return op.astype(np.complex64)
+
+def _build_sparse_operator(gate, targets, controls, n_qubits):
+    if gate in GATES:
+        return sparse_gate_on_n_qubits(GATES[gate], targets[0], n_qubits)
+    elif gate in ["CNOT", "TOFFOLI"]:
+        return sparse_controlled_x(controls, targets[0], n_qubits)
+    raise ValueError(f"No operator for gate {gate}")
+
+# Apply a unitary gate from Circuit.diagram to the state (returns new state)
+def apply_named_gate(state, gate, targets, controls, n_qubits, backend="kernel"):
+    """
+    backend="kernel" runs the matrix-free kernels above, backend="dense" or
+    "sparse" multiplies by the cached explicit operator of that kind.
+    """
+    if backend in ["dense", "sparse"]:
+        op = gate_operator(gate, targets, controls, n_qubits, sparse=backend == "sparse", dtype=state.dtype)
+        return op @ state
+    if gate in GATES:
+        return apply_single_qubit_gate(state, GATES[gate], targets[0], n_qubits)
+    elif gate in ["CNOT", "TOFFOLI"]:
+        return apply_controlled_x(state, controls, targets[0], n_qubits)
+    raise ValueError(f"Unknown gate {gate}")
+
+# Undo a unitary gate from Circuit.diagram (returns new state)
+def apply_inverse_named_gate(state, gate, targets, controls, n_qubits):
+    if gate in GATES:
+        return apply_single_qubit_gate(state, GATES[gate].conj().T, targets[0], n_qubits)
+    elif gate in ["CNOT", "TOFFOLI"]:
+        # controlled-X is its own inverse
+        return apply_controlled_x(state, controls, targets[0], n_qubits)
+    raise ValueError(f"Unknown gate {gate}")
+
+# Marginal outcome probabilities of `qubits` (index = outcome bits in the order given)
+def marginal_probabilities(state, qubits, n_qubits):
+    probs = (np.abs(state)**2).reshape((2,) * n_qubits)
+    others = tuple(q for q in range(n_qubits) if q not in qubits)
+    marginal = probs.sum(axis=others)  # remaining axes are in ascending qubit order
+    ordered = sorted(qubits)
+    return np.transpose(marginal, [ordered.index(q) for q in qubits]).reshape(-1)
+
+# reduced_density_matrices works on blocks of 2**RDM_BLOCK_QUBITS amplitudes (1 MiB
+# at double precision) that stay in cache while all of their qubits are reduced;
+# the qubits above a block are split off RDM_SPLIT_QUBITS at a time.
+RDM_BLOCK_QUBITS = 16
+RDM_SPLIT_QUBITS = 4
+
+# Reduced density matrix of every qubit, shape (n_qubits, 2, 2).
+# The state is read about once per RDM_SPLIT_QUBITS high qubits instead of
+# twice per qubit: see _qubit_sums.
+def reduced_density_matrices(state, n_qubits):
+    total, p1, rho10 = _qubit_sums(state.reshape(-1), n_qubits)
+    rho = np.empty((n_qubits, 2, 2), dtype=complex)
+    rho[:, 0, 0] = total - p1
+    rho[:, 0, 1] = rho10.conj()
+    rho[:, 1, 0] = rho10  # <1|rho_q|0>
+    rho[:, 1, 1] = p1
+    return rho
+
+# (norm^2, P(bit q = 1), <1|rho_q|0>) of the unnormalized amplitudes psi of n qubits.
+# A block that fits in cache is reduced once per qubit. A larger one is viewed as
+# 2**h rows (its h highest qubits); one chunked sweep builds the Gram matrix
+# <row_i|row_j> (the high qubits' entries are sums of it) and the lower qubits are
+# the sums of the same reduction over each row.
+def _qubit_sums(psi, n):
+    if n <= RDM_BLOCK_QUBITS:
+        probs = (np.abs(psi)**2).astype(float)
+        p1 = np.empty(n)
+        rho10 = np.empty(n, dtype=complex)
+        for q in range(n):
+            blocks = psi.reshape(2**q, 2, -1)
+            p1[q] = probs.reshape(2**q, 2, -1)[:, 1].sum()
+            rho10[q] = (blocks[:, 0].conj() * blocks[:, 1]).sum()
+        return probs.sum(), p1, rho10
+    h = min(RDM_SPLIT_QUBITS, n - RDM_BLOCK_QUBITS)
+    rows = psi.reshape(2**h, -1)
+    width = 2**RDM_BLOCK_QUBITS >> h
+    gram = np.zeros((2**h, 2**h), dtype=complex)
+    p1 = np.empty(n)
+    rho10 = np.empty(n, dtype=complex)
+    p1[h:] = 0
+    rho10[h:] = 0
+    for j in range(0, rows.shape[1], width):
+        chunk = rows[:, j:j + width].astype(complex)
+        gram += chunk.conj() @ chunk.T
+    for row in rows:
+        _, row_p1, row_rho10 = _qubit_sums(row, n - h)
+        p1[h:] += row_p1
+        rho10[h:] += row_rho10
+    k = np.arange(2**h)
+    for q in range(h):
+        bit = 1 << (h - 1 - q)
+        low = k[(k & bit) == 0]
+        p1[q] = gram[low | bit, low | bit].real.sum()
+        rho10[q] = gram[low, low | bit].sum()
+    return np.trace(gram).real, p1, rho10
+
+# Bloch vectors (<X>, <Y>, <Z>) of every qubit, shape (n_qubits, 3)
+def bloch_vectors(state, n_qubits):
+    rho = reduced_density_matrices(state, n_qubits)
+    return np.stack([2 * rho[:, 1, 0].real, 2 * rho[:, 1, 0].imag, (rho[:, 0, 0] - rho[:, 1, 1]).real], axis=1)
+
+# Project the state onto the given outcomes of `qubits` and renormalize (returns new state)
+def collapse_to_outcome(state, qubits, outcomes, n_qubits):
+    out = np.zeros_like(state)
+    idx = [slice(None)] * n_qubits
+    for q, bit in zip(qubits, outcomes):
+        idx[q] = bit
+    idx = tuple(idx)
+    out.reshape((2,) * n_qubits)[idx] = state.reshape((2,) * n_qubits)[idx]
+    norm = np.linalg.norm(out)
+    return out / norm if norm > 0 else out
+
+# Measure several qubits at once: returns (outcomes, marginal_probs, collapsed_state)
+def measure_qubits(state, qubits, n_qubits, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    marginal = marginal_probabilities(state, qubits, n_qubits)
+    p = marginal.astype(float)  # single-precision marginals are not normalized tightly enough for choice
+    index = rng.choice(marginal.size, p=p / p.sum())
+    k = len(qubits)
+    outcomes = [(index >> (k - 1 - i)) & 1 for i in range(k)]
+    return outcomes, marginal, collapse_to_outcome(state, qubits, outcomes, n_qubits)
+
 # Measurement: returns (outcome_string, collapsed_state)
-def measure(state, n_shots=1):
+def measure(state, n_shots=1, rng=None):
     """
     Perform projective measurement in computational basis.
     - If n_shots==1: returns (outcome, collapsed_state)
     - If n_shots>1: returns dict counts of outcomes
+    Use sampler.ShotSampler directly for integer count arrays or repeated sampling.
     """
-    probs = np.abs(state.flatten())**2
-    dim = probs.size
-    outcomes = [format(i, f'0{int(np.log2(dim))}b') for i in range(dim)]
+    sampler = ShotSampler(state)
+    n = sampler.n_qubits
     if n_shots == 1:
-        idx = np.random.choice(dim, p=probs)
-        outcome = outcomes[idx]
+        idx = sampler.sample(1, rng)[0]
+        outcome = format(idx, f'0{n}b')
         # collapsed state is basis vector
         collapsed = np.zeros_like(state)
         collapsed[idx, 0] = 1.0
         return outcome, collapsed
     else:
-        choices = np.random.choice(outcomes, size=n_shots, p=probs)
-        counts = {}
-        for c in choices:
-            counts[c] = counts.get(c, 0) + 1
-        return counts
-
+        return counts_to_dict(sampler.counts(n_shots, rng), n)
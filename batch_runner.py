@@ -0,0 +1,229 @@
+# batch_runner.py
+"""
+Headless batch runner: simulates circuit files in a worker pool.
+
+    python batch_runner.py circuits/*.json --output results --save counts --shots 1024 --workers 4
+
+A circuit file is JSON:
+
+    {"n_qubits": 3,
+     "gates": [["H", [0], []], ["CNOT", [1], [0]], ["MEASURE", [2], []]],
+     "shots": 1000}
+
+Gates use the Circuit.diagram layout (gate, targets, controls); the dict form
+{"gate": "CNOT", "targets": [1], "controls": [0]} works too. "shots" is
+optional and overrides --shots for that file. Files ending in .qasm or .qsim
+are read with circuit_io instead (and use --shots).
+
+For every circuit the runner writes <name>.npy (--save state or probabilities)
+or <name>.json (--save counts) into --output, plus one results.json with the
+qubit count, gate count, backend, measurement outcomes and timing per circuit.
+JSON gates are checked like the .qasm/.qsim ones (circuit_io.check_gate). A
+circuit that cannot be read or simulated gets {"circuit": path, "error": ...}
+in results.json instead; the rest of the batch still runs.
+With --backend memmap the state vector lives in a file in --scratch-dir
+(default: the system temp directory) and is streamed in chunks
+(memmap_state.MemmapState), so circuits wider than RAM can run; the outputs
+are written chunk by chunk as well, --fuse does not apply, and the file is
+deleted once the circuit is done.
+Only NumPy is imported, never tkinter or matplotlib.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import circuit_io
+from Basic_1 import zero_state, precision_dtype, collapse_to_outcome, marginal_probabilities
+from fusion import compile_diagram
+from sampler import ShotSampler, counts_to_dict
+from stabilizer import StabilizerState, is_clifford
+from mps import MPSState
+from memmap_state import MemmapState
+
+BACKENDS = ["kernel", "dense", "sparse", "stabilizer", "mps", "memmap"]
+OUTPUTS = ["state", "probabilities", "counts"]
+
+
+def load_circuit(path):
+    """Read a circuit file; returns (n_qubits, diagram, shots or None)"""
+    if path.endswith((".qasm", ".qsim")):
+        n_qubits, diagram = circuit_io.load_circuit(path)
+        return n_qubits, diagram, None
+    with open(path) as f:
+        data = json.load(f)
+    n_qubits = data["n_qubits"]
+    diagram = []
+    for k, entry in enumerate(data["gates"]):
+        if isinstance(entry, dict):
+            entry = (entry["gate"], entry["targets"], entry.get("controls", []))
+        gate, targets, controls = entry
+        gate, targets, controls = gate.upper(), list(targets), list(controls)
+        if gate not in circuit_io.ARITY:
+            raise ValueError(f"{path}: gate {k + 1}: unsupported gate {gate}")
+        try:
+            circuit_io.check_gate(gate, controls + targets, n_qubits)
+        except ValueError as e:
+            raise ValueError(f"{path}: gate {k + 1}: {e}") from None
+        diagram.append((gate, targets, controls))
+    return n_qubits, diagram, data.get("shots")
+
+
+def simulate_vector(diagram, n_qubits, backend, precision, rng, fuse_block_qubits=1):
+    """Run a diagram on a state vector through a fused plan; returns (state, measurements)"""
+    state = zero_state(n_qubits, precision_dtype(precision))
+    measurements = {}
+    for op in compile_diagram(diagram, fuse_block_qubits).ops:
+        if op.is_measurement:
+            q = op.targets[0]
+            p = marginal_probabilities(state, [q], n_qubits).astype(float)
+            outcome = int(rng.random() >= p[0] / p.sum())
+            state = collapse_to_outcome(state, [q], [outcome], n_qubits)
+            measurements[q] = outcome
+        else:
+            state = op.apply(state, n_qubits, backend)
+    return state, measurements
+
+
+def simulate_stabilizer(diagram, n_qubits, rng):
+    tableau = StabilizerState(n_qubits)
+    measurements = {}
+    for gate, targets, controls in diagram:
+        if gate == "MEASURE":
+            measurements[targets[0]] = tableau.measure(targets[0], rng=rng)
+        else:
+            tableau.apply(gate, targets, controls)
+    return tableau, measurements
+
+
+def stabilizer_counts(tableau, shots, rng):
+    """Shot counts from a tableau by measuring every qubit of a copy per shot"""
+    counts = {}
+    for _ in range(shots):
+        shot = tableau.copy()
+        key = "".join(str(shot.measure(q, rng=rng)) for q in range(tableau.n))
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def run_job(job):
+    """simulate_job for one (path, options, seed); a failure becomes an error record"""
+    path = job[0]
+    try:
+        return simulate_job(*job)
+    except Exception as e:
+        # one bad file must not take the finished results of the others down with it
+        message = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+        return {"circuit": path, "error": message}
+
+
+def simulate_job(path, options, seed):
+    """Simulate one circuit file and write its output; returns the summary record"""
+    rng = np.random.default_rng(seed)
+    n, diagram, shots = load_circuit(path)
+    shots = shots or options["shots"]
+    backend = options["backend"]
+    name = os.path.splitext(os.path.basename(path))[0]
+    if backend == "stabilizer" and not is_clifford(diagram):
+        backend = "kernel"  # the tableau only covers Clifford circuits
+
+    t0 = time.perf_counter()
+    engine = None
+    try:
+        if backend == "stabilizer":
+            engine, measurements = simulate_stabilizer(diagram, n, rng)
+        elif backend == "mps":
+            engine = MPSState(n, options["max_bond"])
+            measurements = engine.run(diagram, rng)
+        elif backend == "memmap":
+            engine = MemmapState(n, dtype=precision_dtype(options["precision"]),
+                                 scratch_dir=options.get("scratch_dir"))
+            measurements = engine.run(diagram, rng)
+        else:
+            engine, measurements = simulate_vector(diagram, n, backend, options["precision"], rng, options["fuse"])
+        t_sim = time.perf_counter() - t0
+
+        save = options["save"]
+        if save == "counts":
+            if backend == "stabilizer":
+                result = stabilizer_counts(engine, shots, rng)
+            elif backend == "mps":
+                bits = engine.sample(shots, rng)
+                keys, counts = np.unique(bits, axis=0, return_counts=True)
+                result = {"".join(map(str, k)): int(c) for k, c in zip(keys, counts)}
+            elif backend == "memmap":
+                indices, counts = engine.sparse_counts(shots, rng)
+                result = counts_to_dict(counts, n, indices)
+            else:
+                result = counts_to_dict(ShotSampler(engine).counts(shots, rng), n)
+            out_path = os.path.join(options["output"], name + ".json")
+            with open(out_path, "w") as f:
+                json.dump(result, f)
+        elif backend == "memmap":
+            out_path = os.path.join(options["output"], name + ".npy")
+            engine.save(out_path, probabilities=save == "probabilities")
+        else:
+            state = engine if backend not in ["stabilizer", "mps"] else engine.to_statevector()
+            result = state.reshape(-1) if save == "state" else np.abs(state.reshape(-1))**2
+            out_path = os.path.join(options["output"], name + ".npy")
+            np.save(out_path, result)
+    finally:
+        if isinstance(engine, MemmapState):
+            engine.close()  # removes the scratch file
+
+    return {
+        "circuit": path,
+        "n_qubits": n,
+        "gates": len(diagram),
+        "backend": backend,
+        "measurements": {str(q): int(b) for q, b in measurements.items()},
+        "output": out_path,
+        "simulate_seconds": t_sim,
+        "total_seconds": time.perf_counter() - t0,
+    }
+
+
+def run_batch(paths, options, workers=1, seed=None):
+    """Run every circuit file, in a process pool when workers > 1; returns the summary records"""
+    os.makedirs(options["output"], exist_ok=True)
+    seeds = np.random.SeedSequence(seed).spawn(len(paths))
+    jobs = [(path, options, s) for path, s in zip(paths, seeds)]
+    if workers == 1:
+        return [run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("circuits", nargs="+", help="circuit files (.json, .qasm or .qsim)")
+    parser.add_argument("--output", default="results")
+    parser.add_argument("--save", choices=OUTPUTS, default="probabilities")
+    parser.add_argument("--shots", type=int, default=1024)
+    parser.add_argument("--backend", choices=BACKENDS, default="kernel")
+    parser.add_argument("--precision", choices=["double", "single"], default="double")
+    parser.add_argument("--fuse", type=int, default=1, help="largest gate block to fuse")
+    parser.add_argument("--max-bond", type=int, default=64, help="MPS bond dimension cap")
+    parser.add_argument("--scratch-dir", default=None, help="directory for the memmap backend's state files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    options = {"output": args.output, "save": args.save, "shots": args.shots, "backend": args.backend,
+               "precision": args.precision, "fuse": args.fuse, "max_bond": args.max_bond, "scratch_dir": args.scratch_dir}
+    t0 = time.perf_counter()
+    records = run_batch(args.circuits, options, args.workers, args.seed)
+    with open(os.path.join(args.output, "results.json"), "w") as f:
+        json.dump({"wall_seconds": time.perf_counter() - t0, "circuits": records}, f, indent=2)
+    for r in records:
+        if "error" in r:
+            print(f"{r['circuit']}: failed, {r['error']}")
+            continue
+        print(f"{r['circuit']}: {r['n_qubits']} qubits, {r['gates']} gates, "
+              f"{r['backend']}, {r['simulate_seconds'] * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
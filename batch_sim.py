@@ -0,0 +1,105 @@
+# batch_sim.py
+import numpy as np
+from Basic_1 import GATES, apply_single_qubit_gate, apply_controlled_x, precision_dtype
+
+
+class BatchSimulator:
+    """
+    Holds a (batch, 2^n) array of state vectors and applies every gate to all
+    rows (or a chosen subset of rows) in one vectorized call.
+    """
+
+    def __init__(self, n_qubits, states, rng=None):
+        self.n = n_qubits
+        states = np.asarray(states)  # complex64 rows stay single precision
+        if not np.iscomplexobj(states):
+            states = states.astype(complex)
+        self.states = states.reshape(-1, 2**n_qubits)
+        self.measurements = np.full((len(self.states), n_qubits), -1)  # -1 = not measured
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    @classmethod
+    def from_initial_states(cls, n_qubits, initial_states, rng=None, precision=None):
+        """initial_states: basis-state indices and/or state vectors, one per row"""
+        dim = 2**n_qubits
+        states = np.zeros((len(initial_states), dim), dtype=precision_dtype(precision))
+        for row, init in enumerate(initial_states):
+            if np.isscalar(init):
+                states[row, int(init)] = 1.0
+            else:
+                states[row] = np.asarray(init).reshape(dim)
+        return cls(n_qubits, states, rng)
+
+    @property
+    def batch_size(self):
+        return len(self.states)
+
+    def probabilities(self):
+        return np.abs(self.states)**2
+
+    def apply(self, gate, targets, controls=(), rows=None):
+        """Apply one diagram gate to every row, or only to `rows`"""
+        if rows is None:
+            self.states = self._apply(self.states, gate, targets, controls, slice(None))
+        else:
+            self.states[rows] = self._apply(self.states[rows], gate, targets, controls, rows)
+
+    def _apply(self, states, gate, targets, controls, rows):
+        if gate in GATES:
+            return apply_single_qubit_gate(states, GATES[gate], targets[0], self.n)
+        elif gate in ["CNOT", "TOFFOLI"]:
+            return apply_controlled_x(states, controls, targets[0], self.n)
+        elif gate == "MEASURE":
+            return self._measure(states, targets[0], rows)
+        raise ValueError(f"Unknown gate {gate}")
+
+    def _measure(self, states, qubit, rows):
+        """Measure `qubit` in every row independently and collapse each row"""
+        psi = states.reshape(len(states), 2**qubit, 2, -1)
+        outcome_probs = (np.abs(psi)**2).sum(axis=(1, 3))  # (batch, 2)
+        p0 = outcome_probs[:, 0] / outcome_probs.sum(axis=1)
+        outcomes = (self.rng.random(len(states)) >= p0).astype(int)
+        psi = psi.copy()
+        psi[outcomes == 0, :, 1, :] = 0
+        psi[outcomes == 1, :, 0, :] = 0
+        norms = np.sqrt(outcome_probs[np.arange(len(states)), outcomes])
+        psi /= np.where(norms > 0, norms, 1)[:, None, None, None]
+        self.measurements[rows, qubit] = outcomes
+        return psi.reshape(states.shape)
+
+
+def run_circuit_batch(diagram, n_qubits, initial_states, rng=None, precision=None):
+    """
+    Run one circuit (a Circuit.diagram list) over many initial states at once.
+    Returns the BatchSimulator holding the final states and measurements.
+    """
+    sim = BatchSimulator.from_initial_states(n_qubits, initial_states, rng, precision)
+    for gate, targets, controls in diagram:
+        sim.apply(gate, targets, controls)
+    return sim
+
+
+def run_circuits_batch(circuits, rng=None):
+    """
+    Run many circuits of the same width (Circuit objects) from |0...0>.
+    At every step the circuits doing the same gate share one vectorized call;
+    row i of the result belongs to circuits[i].
+    """
+    n = circuits[0].n
+    if any(c.n != n for c in circuits):
+        raise ValueError("All circuits in a batch must have the same number of qubits")
+    sim = BatchSimulator.from_initial_states(n, [0] * len(circuits), rng, circuits[0].precision)
+
+    depth = max(len(c.diagram) for c in circuits)
+    for step in range(depth):
+        groups = {}  # (gate, targets, controls) -> rows
+        for row, c in enumerate(circuits):
+            if step < len(c.diagram):
+                gate, targets, controls = c.diagram[step]
+                groups.setdefault((gate, tuple(targets), tuple(controls)), []).append(row)
+        for (gate, targets, controls), rows in groups.items():
+            if len(rows) == len(circuits):
+                sim.apply(gate, list(targets), list(controls))
+            else:
+                sim.apply(gate, list(targets), list(controls), rows=np.array(rows))
+    return sim
@@ -0,0 +1,58 @@
+# bench_parallel.py
+"""
+Scaling benchmark for parallel.ParallelExecutor.
+
+    python bench_parallel.py --min-qubits 20 --max-qubits 28 --workers 1 2 4 8
+
+For every qubit count it times an H layer (one H per qubit) and a CNOT chain
+with each worker count and prints the time per gate and the speedup over the
+first worker count. A 28-qubit run needs about 8 GiB of RAM (state + output).
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from Basic_1 import H
+from parallel import ParallelExecutor
+
+
+def time_gates(executor, n, repeats):
+    state = np.zeros((2**n, 1), dtype=complex)
+    state[0, 0] = 1.0
+    best_h = best_cx = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for q in range(n):
+            state = executor.apply_single_qubit_gate(state, H, q, n)
+        t1 = time.perf_counter()
+        for q in range(n - 1):
+            state = executor.apply_controlled_x(state, [q], q + 1, n)
+        t2 = time.perf_counter()
+        best_h = min(best_h, (t1 - t0) / n)
+        best_cx = min(best_cx, (t2 - t1) / (n - 1))
+    return best_h, best_cx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-qubits", type=int, default=20)
+    parser.add_argument("--max-qubits", type=int, default=24)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'n':>3} {'workers':>7} {'H ms/gate':>10} {'CX ms/gate':>11} {'H speedup':>10} {'CX speedup':>11}")
+    for n in range(args.min_qubits, args.max_qubits + 1):
+        base = None
+        for w in args.workers:
+            executor = ParallelExecutor(w, min_parallel_qubits=0)
+            h, cx = time_gates(executor, n, args.repeats)
+            executor.shutdown()
+            if base is None:
+                base = (h, cx)
+            print(f"{n:>3} {w:>7} {h * 1e3:>10.2f} {cx * 1e3:>11.2f} {base[0] / h:>10.2f} {base[1] / cx:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# benchmarks.py
+"""
+Benchmark suite for the simulation kernels and the GUI refresh path.
+
+    python benchmarks.py --max-qubits 20 --output bench.json
+    python benchmarks.py --output new.json --compare bench.json
+
+Every benchmark is swept over n = --min-qubits .. its own feasible maximum
+(dense operators and the GUI stop earlier, see the --max-* options). For each
+(benchmark, n) the best wall time over --repeats runs is recorded, plus the
+peak traced memory (tracemalloc, which also sees NumPy buffers) of one extra
+run. Results go to a JSON file together with the commit and library versions;
+--compare prints the time ratio against an earlier results file.
+
+The GUI benchmarks render with the Agg backend. update_canvas needs a Tk
+display and is skipped (recorded as such) when there is none.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import numpy as np
+from Basic_1 import (
+    H, zero_state, apply_single_qubit_gate, apply_controlled_x,
+    cnot_on_n_qubits, toffoli_on_n_qubits, measure,
+)
+from operator_cache import operator_cache
+from gui_version6 import Circuit, QuantumGUI, BG_COLOR
+from histogram import ProbabilityHistogram
+
+
+def superposition(n):
+    state = zero_state(n)
+    for q in range(n):
+        state = apply_single_qubit_gate(state, H, q, n)
+    return state
+
+
+def layered_circuit(n, depth=4):
+    """H on every qubit, then CNOT ladders: depth * (2n - 1) gates"""
+    circuit = Circuit(n, backend="kernel")
+    for _ in range(depth):
+        for q in range(n):
+            circuit.add_gate("H", targets=[q])
+        for q in range(n - 1):
+            circuit.add_gate("CNOT", targets=[q + 1], controls=[q])
+    return circuit
+
+
+# Each benchmark takes n and returns the function to time (setup is not timed),
+# or (function, cleanup) when it holds something that has to be released afterwards
+def bench_apply_single_qubit_gate(n):
+    state = superposition(n)
+    return lambda: [apply_single_qubit_gate(state, H, q, n) for q in range(n)]
+
+
+def bench_apply_controlled_x(n):
+    state = superposition(n)
+    return lambda: apply_controlled_x(state, [0], n - 1, n)
+
+
+def bench_cnot_on_n_qubits(n):
+    state = superposition(n)
+
+    def run():
+        operator_cache.clear()  # time the build, not a cache hit
+        return cnot_on_n_qubits(0, n - 1, n) @ state
+    return run
+
+
+def bench_toffoli_on_n_qubits(n):
+    state = superposition(n)
+
+    def run():
+        operator_cache.clear()
+        return toffoli_on_n_qubits(0, 1, n - 1, n) @ state
+    return run
+
+
+def bench_measure(n):
+    state = superposition(n)
+    rng = np.random.default_rng(0)
+    return lambda: measure(state, n_shots=1000, rng=rng)
+
+
+def bench_measure_qubit_collapse(n):
+    circuit = Circuit(n, backend="kernel")
+    circuit.state = superposition(n)
+
+    def run():
+        probs = np.abs(circuit.state.flatten())**2
+        outcome = circuit.measure_qubit(probs, n - 1)
+        return circuit.collapse_state(n - 1, outcome)
+    return run
+
+
+def bench_prev_gate_replay(n):
+    """Step back from the end of a layered circuit, as QuantumGUI.prev_gate does"""
+    circuit = layered_circuit(n)
+    last = len(circuit.diagram) - 1
+    circuit.goto_step(last)
+
+    def run():
+        circuit.goto_step(last - 1)
+        circuit.goto_step(last)
+    return run
+
+
+def bench_replay_from_start(n):
+    """Replay the whole layered circuit from |0...0> (the path taken when no undo applies)"""
+    circuit = layered_circuit(n)
+    last = len(circuit.diagram) - 1
+
+    def run():
+        circuit.reset()
+        circuit.goto_step(last)
+    return run
+
+
+def headless_gui(circuit):
+    """QuantumGUI with only the parts update_probabilities needs, drawn with Agg"""
+    gui = QuantumGUI.__new__(QuantumGUI)
+    gui.circuit = circuit
+    gui.fig, gui.ax = plt.subplots(figsize=(6, 2), facecolor=BG_COLOR)
+    gui.prob_canvas = FigureCanvasAgg(gui.fig)
+    gui.histogram = ProbabilityHistogram(gui.fig, gui.ax, gui.prob_canvas)
+    return gui
+
+
+def bench_update_probabilities(n):
+    circuit = layered_circuit(n, depth=1)
+    circuit.goto_step(len(circuit.diagram) - 1)
+    gui = headless_gui(circuit)
+    return gui.update_probabilities
+
+
+def bench_update_canvas(n):
+    import tkinter as tk
+    root = tk.Tk()  # raises TclError without a display
+    root.withdraw()
+    circuit = layered_circuit(n)
+    gui = QuantumGUI(root, circuit)
+
+    def cleanup():
+        gui.worker.stop()
+        root.destroy()
+    return gui.update_canvas, cleanup
+
+
+# name -> (benchmark, option holding its largest n)
+BENCHMARKS = {
+    "apply_single_qubit_gate": (bench_apply_single_qubit_gate, "max_qubits"),
+    "apply_controlled_x": (bench_apply_controlled_x, "max_qubits"),
+    "cnot_on_n_qubits": (bench_cnot_on_n_qubits, "max_dense_qubits"),
+    "toffoli_on_n_qubits": (bench_toffoli_on_n_qubits, "max_dense_qubits"),
+    "measure": (bench_measure, "max_qubits"),
+    "measure_qubit_collapse": (bench_measure_qubit_collapse, "max_qubits"),
+    "prev_gate_replay": (bench_prev_gate_replay, "max_qubits"),
+    "replay_from_start": (bench_replay_from_start, "max_qubits"),
+    "update_probabilities": (bench_update_probabilities, "max_gui_qubits"),
+    "update_canvas": (bench_update_canvas, "max_gui_qubits"),
+}
+
+
+def run_benchmark(make, n, repeats):
+    """Best time over `repeats` runs and peak traced bytes of one more run (setup included in neither)"""
+    fn = make(n)
+    fn, cleanup = fn if isinstance(fn, tuple) else (fn, None)
+    try:
+        best = float("inf")
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        plt.close("all")
+        if cleanup is not None:
+            cleanup()
+    return best, peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["n"]): r for r in json.load(f)["results"] if "seconds" in r}
+    print(f"{'benchmark':<24} {'n':>3} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r["benchmark"], r["n"]))
+        if old is not None and "seconds" in r:
+            print(f"{r['benchmark']:<24} {r['n']:>3} {old['seconds'] * 1e3:>10.3f} "
+                  f"{r['seconds'] * 1e3:>10.3f} {r['seconds'] / old['seconds']:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-qubits", type=int, default=2)
+    parser.add_argument("--max-qubits", type=int, default=20)
+    parser.add_argument("--max-dense-qubits", type=int, default=12, help="cnot/toffoli build 4^n operators")
+    parser.add_argument("--max-gui-qubits", type=int, default=10, help="the histogram draws 2^n bars")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--output", default="benchmarks.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.only:
+        make, limit = BENCHMARKS[name]
+        for n in range(max(args.min_qubits, 3 if "toffoli" in name else 2), getattr(args, limit) + 1):
+            try:
+                seconds, peak = run_benchmark(make, n, args.repeats)
+            except Exception as e:  # e.g. no display for update_canvas
+                results.append({"benchmark": name, "n": n, "skipped": f"{type(e).__name__}: {e}"})
+                print(f"{name:<24} n={n:>2} skipped ({type(e).__name__})")
+                break
+            results.append({"benchmark": name, "n": n, "seconds": seconds, "peak_bytes": peak})
+            print(f"{name:<24} n={n:>2} {seconds * 1e3:>10.3f} ms {peak / 2**20:>9.2f} MiB")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "repeats": args.repeats,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,180 @@
+import functools
 import tkinter as tk
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
 
-def draw_bloch(ax, vector=[0,0,1], title="Bloch Sphere"):
-    # Sphere surface
-    u = np.linspace(0, 2 * np.pi, 100)
-    v = np.linspace(0, np.pi, 100)
-    x = np.outer(np.cos(u), np.sin(v))
-    y = np.outer(np.sin(u), np.sin(v))
-    z = np.outer(np.ones(np.size(u)), np.cos(v))
-    ax.plot_surface(x, y, z, color='lightblue', alpha=0.2, edgecolor='gray')
-
-    # Axes
-    ax.quiver(0,0,0, 1,0,0, color="purple")   # x
-    ax.quiver(0,0,0, 0,1,0, color="green")    # y
-    ax.quiver(0,0,0, 0,0,1, color="red")      # z
-
-    # State vector (black arrow)
-    ax.quiver(0,0,0, vector[0], vector[1], vector[2], color="black", linewidth=2)
-
-    # Labels
-    ax.text(0,0,1.1,"|0>")
-    ax.text(0,0,-1.1,"|1>")
-    ax.text(1.1,0,0,"|+>")
-    ax.text(-1.1,0,0,"|->")
-    ax.text(0,1.1,0,"|+i>")
-    ax.text(0,-1.1,0,"|-i>")
+FRAME_RATE = 30         # frames per second of an animated gate rotation
+ROTATION_SECONDS = 0.5  # duration of one animated gate rotation
+
+# Every single-qubit gate of the simulator is a pi rotation about one of these axes
+GATE_AXES = {
+    "H": (1 / np.sqrt(2), 0, 1 / np.sqrt(2)),
+    "X": (1, 0, 0),
+    "Y": (0, 1, 0),
+    "Z": (0, 0, 1),
+}
+
+KET_LABELS = [((0, 0, 1.1), "|0>"), ((0, 0, -1.1), "|1>"), ((1.1, 0, 0), "|+>"),
+              ((-1.1, 0, 0), "|->"), ((0, 1.1, 0), "|+i>"), ((0, -1.1, 0), "|-i>")]
+
+
+# Sphere grid, computed once per resolution and shared (read-only) by every sphere
+@functools.lru_cache(maxsize=None)
+def sphere_mesh(n_u=40, n_v=20):
+    u, v = np.mgrid[0:2*np.pi:complex(0, n_u), 0:np.pi:complex(0, n_v)]
+    mesh = (np.cos(u) * np.sin(v), np.sin(u) * np.sin(v), np.cos(v))
+    for a in mesh:
+        a.flags.writeable = False
+    return mesh
+
+
+# Equator and two meridians: a much cheaper outline than a full mesh
+@functools.lru_cache(maxsize=None)
+def sphere_outline(points=48):
+    t = np.linspace(0, 2 * np.pi, points)
+    c, s, zero = np.cos(t), np.sin(t), np.zeros_like(t)
+    circles = (np.array([c, s, zero]), np.array([c, zero, s]), np.array([zero, c, s]))
+    for a in circles:
+        a.flags.writeable = False
+    return circles
+
+
+# Rotate a 3-vector by `angle` about the unit `axis` (Rodrigues' formula)
+def rotate(vector, axis, angle):
+    v, k = np.asarray(vector, dtype=float), np.asarray(axis, dtype=float)
+    return v * np.cos(angle) + np.cross(k, v) * np.sin(angle) + k * np.dot(k, v) * (1 - np.cos(angle))
+
+
+class BlochSphere:
+    """
+    Bloch sphere on a 3D axes whose sphere, axes and labels are drawn once.
+    The state arrow (and its optional label) are animated artists: set_vector
+    only moves them and blits them over the cached background of the axes,
+    and rotate() animates a gate at FRAME_RATE frames per second, each frame
+    being one such arrow update. A full redraw (resize, mouse rotation)
+    refreshes the cached background.
+
+    style is "surface", "wireframe" or "outline" (three great circles).
+    """
+
+    def __init__(self, ax, vector=(0, 0, 1), style="surface", color="lightblue", alpha=0.2,
+                 mesh=(40, 20), axis_colors=("purple", "green", "red"), labels=(),
+                 arrow_color="black", arrow_label=None, fontsize=12):
+        self.ax = ax
+        if style == "surface":
+            ax.plot_surface(*sphere_mesh(*mesh), color=color, alpha=alpha, edgecolor="gray")
+        elif style == "wireframe":
+            ax.plot_wireframe(*sphere_mesh(*mesh), color=color, alpha=alpha, linewidth=0.5)
+        else:
+            for circle in sphere_outline():
+                ax.plot(*circle, color=color, alpha=alpha, linewidth=0.5)
+        if axis_colors is not None:
+            for axis, c in zip(np.eye(3), axis_colors):
+                ax.quiver(0, 0, 0, *axis, color=c, arrow_length_ratio=0.1)
+        for entry in labels:
+            position, text = entry[0], entry[1]
+            ax.text(*position, text, color=entry[2] if len(entry) > 2 else None, fontsize=fontsize)
+
+        self.arrow, = ax.plot([0, 0], [0, 0], [0, 1], color=arrow_color, linewidth=2,
+                              marker="o", markevery=[1], markersize=4, animated=True)
+        self.label = None
+        if arrow_label is not None:
+            self.label = ax.text(0, 0, 0, arrow_label, color=arrow_color, fontsize=fontsize, animated=True)
+        self.background = None
+        self.frames = []  # vectors still to show in the running animation
+        self.timer = None
+        self.cid = ax.figure.canvas.mpl_connect("draw_event", self._on_draw)
+        self.set_vector(vector, redraw=False)
 
+    def disconnect(self):
+        """Stop animating and drop the draw callback (before the axes is cleared)"""
+        self.finish()
+        self.ax.figure.canvas.mpl_disconnect(self.cid)
+
+    def set_vector(self, vector, redraw=True):
+        """Point the arrow along `vector` (length < 1 for a mixed state)"""
+        self.vector = np.asarray(vector, dtype=float)
+        x, y, z = self.vector
+        self.arrow.set_data_3d([0, x], [0, y], [0, z])
+        if self.label is not None:
+            self.label.set_position_3d(1.3 * self.vector)
+        if redraw:
+            self._blit()
+
+    # --- animation ---
+    def rotate(self, axis, angle=np.pi, seconds=ROTATION_SECONDS):
+        """Animate the arrow turning by `angle` about `axis`; returns the final vector"""
+        self.finish()
+        start = self.vector
+        n_frames = max(1, int(round(seconds * FRAME_RATE)))
+        self.frames = [rotate(start, axis, angle * (i + 1) / n_frames) for i in range(n_frames)]
+        target = self.frames[-1]
+        self.timer = self.ax.figure.canvas.new_timer(interval=int(1000 / FRAME_RATE))
+        self.timer.add_callback(self._next_frame)
+        self.timer.start()
+        return target
+
+    def apply_gate(self, gate):
+        """Animate a single-qubit gate of the simulator (H, X, Y or Z)"""
+        return self.rotate(GATE_AXES[gate], np.pi)
+
+    def _next_frame(self):
+        if not self.frames:
+            self.finish()
+            return
+        self.set_vector(self.frames.pop(0))
+
+    def finish(self):
+        """Stop a running animation and jump to its last frame"""
+        if self.timer is not None:
+            self.timer.stop()
+            self.timer = None
+        if self.frames:
+            last = self.frames[-1]
+            self.frames = []
+            self.set_vector(last)
+
+    # --- drawing ---
+    def _animated(self):
+        return [self.arrow] + ([self.label] if self.label is not None else [])
+
+    def _on_draw(self, event):
+        self.background = event.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self._animated():
+            self.ax.draw_artist(artist)
+
+    def _blit(self):
+        canvas = self.ax.figure.canvas
+        if self.background is None:
+            canvas.draw_idle()  # _on_draw caches the background
+            return
+        canvas.restore_region(self.background)
+        for artist in self._animated():
+            self.ax.draw_artist(artist)
+        canvas.blit(self.ax.bbox)
+
+
+def draw_bloch(ax, vector=[0,0,1], title="Bloch Sphere"):
+    # Sphere surface, axes (x purple, y green, z red) and basis labels; the black arrow is the state
+    sphere = BlochSphere(ax, vector, mesh=(100, 100), labels=KET_LABELS)
     ax.set_title(title)
     ax.set_box_aspect([1,1,1])
     ax.axis("off")
+    return sphere
 
 def show_two_spheres(parent):
     new_win = tk.Toplevel(parent)
     new_win.title("Two Bloch Spheres")
 
     fig = Figure(figsize=(8,4))
+    canvas = FigureCanvasTkAgg(fig, master=new_win)
     ax1 = fig.add_subplot(121, projection='3d')
     ax2 = fig.add_subplot(122, projection='3d')
 
     draw_bloch(ax1, [0,0,1], title="|0> state")
     draw_bloch(ax2, [1,0,0], title="|+> state")
 
-    canvas = FigureCanvasTkAgg(fig, master=new_win)
     canvas.draw()
     canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
@@ -3,27 +3,14 @@ from tkinter import Toplevel
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
+from bloch_sphere import BlochSphere
 
 
-# Function to draw Bloch sphere
+# Function to draw Bloch sphere (the sphere is drawn once; later updates only move the arrow)
 def draw_bloch(ax, vector, title):
-    # Sphere surface
-    u, v = np.mgrid[0:2*np.pi:40j, 0:np.pi:20j]
-    x = np.cos(u)*np.sin(v)
-    y = np.sin(u)*np.sin(v)
-    z = np.cos(v)
-    ax.plot_surface(x, y, z, color="skyblue", alpha=0.1, edgecolor="gray")
-
-    # Axes with labels
-    ax.quiver(0,0,0,1,0,0,color="purple",linewidth=1.5)  # X
-    ax.quiver(0,0,0,0,1,0,color="green",linewidth=1.5)  # Y
-    ax.quiver(0,0,0,0,0,1,color="red",linewidth=1.5)    # Z
-    ax.text(1.1,0,0,'X', color='purple', fontsize=12)
-    ax.text(0,1.1,0,'Y', color='green', fontsize=12)
-    ax.text(0,0,1.1,'Z', color='red', fontsize=12)
-
-    # State vector
-    ax.quiver(0,0,0,vector[0],vector[1],vector[2],color="black",linewidth=2)
+    # Sphere surface, axes with labels and the state vector (black arrow)
+    sphere = BlochSphere(ax, vector, color="skyblue", alpha=0.1, mesh=(40, 20),
+                         labels=[((1.1,0,0), 'X', 'purple'), ((0,1.1,0), 'Y', 'green'), ((0,0,1.1), 'Z', 'red')])
 
     # Formatting
     ax.set_xlim([-1,1]); ax.set_ylim([-1,1]); ax.set_zlim([-1,1])
@@ -38,6 +25,7 @@ def draw_bloch(ax, vector, title):
     # Label at the bottom
     ax.text2D(0.5, -0.05, "Black arrow = state vector", transform=ax.transAxes, 
               ha="center", fontsize=10)
+    return sphere
 
 # Function to show Bloch sphere for a gate or qubit state
 def show_bloch(parent):
@@ -46,6 +34,7 @@ def show_bloch(parent):
     new_win.title(f"{name} - Bloch Sphere")
 
     fig = plt.Figure(figsize=(6,6))
+    canvas = FigureCanvasTkAgg(fig, master=new_win)
     ax = fig.add_subplot(111, projection='3d')
 
     # Define vectors
@@ -68,7 +57,6 @@ def show_bloch(parent):
     draw_bloch(ax, vec, title)
     ax.set_title(title, fontsize=14, pad=20)
 
-    canvas = FigureCanvasTkAgg(fig, master=new_win)
     canvas.draw()
     canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
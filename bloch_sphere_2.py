@@ -3,6 +3,7 @@ import tkinter as tk
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Button
 from mpl_toolkits.mplot3d import Axes3D
+from bloch_sphere import BlochSphere
 
 def run_bloch_simulator():
 # Qubit states
@@ -35,56 +36,33 @@ def run_bloch_simulator():
         return np.array([x, y, z])
 
 
-    # Draw Bloch Sphere
-    def draw_bloch(state, ax):
-        ax.clear()
-        vec = bloch_vector(state)
-
-        # Sphere grid
-        u = np.linspace(0, 2 * np.pi, 60)
-        v = np.linspace(0, np.pi, 30)
-        x = np.outer(np.cos(u), np.sin(v))
-        y = np.outer(np.sin(u), np.sin(v))
-        z = np.outer(np.ones_like(u), np.cos(v))
-        ax.plot_wireframe(x, y, z, color='c', alpha=0.3, linewidth=0.5)
-
-        # Axes arrows
-        ax.quiver(0, 0, 0, 1, 0, 0, color='r', arrow_length_ratio=0.1)
-        ax.quiver(0, 0, 0, 0, 1, 0, color='g', arrow_length_ratio=0.1)
-        ax.quiver(0, 0, 0, 0, 0, 1, color='b', arrow_length_ratio=0.1)
-
-        # Axes labels
-        ax.text(1.2, 0, 0, 'X', color='r', fontsize=12)
-        ax.text(0, 1.1, 0, 'Y', color='g', fontsize=12)
-        ax.text(0, 0, 1.1, 'Z', color='b', fontsize=12)
-
-        # Basis labels
-        ax.text(0, 0, 1.3, '|0⟩', color='b', fontsize=12)
-        ax.text(0, 0, -1.3, '|1⟩', color='b', fontsize=12)
-
-        # Bloch vector
-        ax.quiver(0, 0, 0, vec[0], vec[1], vec[2], color='k', linewidth=2, arrow_length_ratio=0.2)
-        ax.text(vec[0] * 1.5, vec[1] * 1.5, vec[2] * 1.5, 'Ψ', color='k', fontsize=12)
-
+    # Bloch Sphere: the wireframe, axes and labels are drawn once (see make_sphere);
+    # state changes only move the arrow, and gates animate as rotations
+    def make_sphere(ax):
+        sphere = BlochSphere(ax, bloch_vector(current_state), style="wireframe", color='c', alpha=0.3,
+                             mesh=(60, 30), axis_colors=('r', 'g', 'b'), arrow_color='k', arrow_label='Ψ',
+                             labels=[((1.2, 0, 0), 'X', 'r'), ((0, 1.1, 0), 'Y', 'g'), ((0, 0, 1.1), 'Z', 'b'),
+                                     ((0, 0, 1.3), '|0⟩', 'b'), ((0, 0, -1.3), '|1⟩', 'b')])
         ax.set_xlim([-1.2, 1.2]);
         ax.set_ylim([-1.2, 1.2]);
         ax.set_zlim([-1.2, 1.2])
         ax.set_box_aspect([1, 1, 1])
         ax.view_init(30, 45)
-        plt.draw()
+        return sphere
 
 
     # Button callbacks
     def set_state(label):
-        global current_state
+        nonlocal current_state
         current_state = states[label]
-        draw_bloch(current_state, ax)
+        sphere.finish()
+        sphere.set_vector(bloch_vector(current_state))
 
 
     def apply_gate(label):
-        global current_state
+        nonlocal current_state
         current_state = np.dot(gates[label], current_state)
-        draw_bloch(current_state, ax)
+        sphere.apply_gate(label)
 
 
     # Create figure
@@ -93,7 +71,7 @@ def run_bloch_simulator():
     plt.subplots_adjust(bottom=0.35)
 
     # Initial draw
-    draw_bloch(current_state, ax)
+    sphere = make_sphere(ax)
 
     # Add state buttons
     state_labels = list(states.keys())
@@ -0,0 +1,73 @@
+# bloch_view.py
+import tkinter as tk
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from bloch_sphere import BlochSphere
+
+MAX_COLUMNS = 5        # spheres per row
+MAX_SPHERES = 32       # wider circuits only show their first qubits
+SPHERE_SIZE = 1.8      # inches per sphere
+
+
+class BlochView:
+    """
+    One Bloch sphere per qubit, in a Toplevel, for the live state of a Circuit.
+    Each sphere is a bloch_sphere.BlochSphere: the outlines, axes and labels
+    are drawn when the window is built, and update() only moves and blits the
+    state arrows (shorter than 1 for a mixed, i.e. entangled, qubit).
+    """
+
+    def __init__(self, parent, n_qubits, bg="white", fg="black", color="black"):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Bloch Spheres")
+        self.window.configure(bg=bg)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.bg, self.fg, self.color = bg, fg, color
+        self.fig = Figure(facecolor=bg)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.open = True
+        self.spheres = []
+        self.build(n_qubits)
+
+    def build(self, n_qubits):
+        self.n = n_qubits
+        shown = min(n_qubits, MAX_SPHERES)
+        cols = min(shown, MAX_COLUMNS)
+        rows = -(-shown // cols)
+        for sphere in self.spheres:
+            sphere.disconnect()
+        self.fig.clear()
+        self.fig.set_size_inches(cols * SPHERE_SIZE, rows * SPHERE_SIZE)
+        self.spheres = []
+        for q in range(shown):
+            ax = self.fig.add_subplot(rows, cols, q + 1, projection="3d")
+            for axis in np.eye(3):
+                ax.plot(*np.stack([-axis, axis], axis=1), color="gray", linewidth=0.5)
+            self.spheres.append(BlochSphere(ax, style="outline", color="gray", alpha=0.5, axis_colors=None,
+                                            labels=[((0, 0, 1.25), "|0>", self.fg), ((0, 0, -1.4), "|1>", self.fg)],
+                                            arrow_color=self.color, fontsize=7))
+            ax.set_title(f"q{q}", color=self.fg, fontsize=9)
+            ax.set_xlim(-1, 1); ax.set_ylim(-1, 1); ax.set_zlim(-1, 1)
+            ax.set_box_aspect([1, 1, 1])
+            ax.set_facecolor(self.bg)
+            ax.axis("off")
+        if shown < n_qubits:
+            self.fig.suptitle(f"First {shown} of {n_qubits} qubits", color=self.fg, fontsize=9)
+        self.fig.tight_layout()
+        self.canvas.draw_idle()
+
+    def update(self, vectors, n_qubits=None):
+        """Point the arrows along `vectors`, shape (qubits shown, 3), for an n_qubits circuit"""
+        n_qubits = len(vectors) if n_qubits is None else n_qubits
+        if n_qubits != self.n:
+            self.build(n_qubits)
+        for sphere, vector in zip(self.spheres, vectors):
+            sphere.set_vector(vector)
+
+    def close(self):
+        self.open = False
+        for sphere in self.spheres:
+            sphere.disconnect()
+        self.window.destroy()
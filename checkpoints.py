@@ -0,0 +1,198 @@
+# checkpoints.py
+import random
+import tempfile
+
+import numpy as np
+from Basic_1 import zero_state, apply_inverse_named_gate, collapse_to_outcome, measure_qubits
+from fusion import compile_diagram
+
+DEFAULT_INTERVAL = 16
+DEFAULT_BUDGET_BYTES = 512 * 2**20  # 512 MiB
+
+
+class CheckpointStore:
+    """
+    Snapshots of the circuit state after every `interval`-th step.
+    When the snapshots outgrow `max_bytes` the interval doubles and the
+    snapshots that are off the new grid are dropped, so memory stays bounded
+    while any step is at most `interval` gate applications from a snapshot.
+    At least one snapshot is always kept: a state vector larger than the
+    budget on its own (from about 25 qubits at the default) is written to a
+    temporary file instead of memory, so a backward step across a MEASURE
+    still replays from the latest snapshot rather than from step 0.
+    Step -1 (the initial state) is never stored; callers rebuild it.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_bytes=DEFAULT_BUDGET_BYTES, spill_dir=None):
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir  # directory for snapshots over the budget (None = system temp)
+        self.current_bytes = 0
+        self.snapshots = {}  # step -> (state, measurements)
+
+    def maybe_save(self, step, state, measurements):
+        """Store a snapshot of the state after `step` if it is on the grid"""
+        if (step + 1) % self.interval != 0 or step in self.snapshots:
+            return
+        self.snapshots[step] = (self._copy(state), dict(measurements))
+        self.current_bytes += state.nbytes
+        while self.current_bytes > self.max_bytes and len(self.snapshots) > 1:
+            self._thin()
+
+    def _copy(self, state):
+        if not isinstance(state, np.ndarray) or state.nbytes <= self.max_bytes:
+            return state.copy()
+        # the file is unlinked as soon as it is closed, i.e. when the snapshot is dropped
+        spilled = np.memmap(tempfile.TemporaryFile(dir=self.spill_dir), dtype=state.dtype,
+                            mode="w+", shape=state.shape)
+        spilled[...] = state
+        return spilled
+
+    def nearest(self, step):
+        """Closest snapshot at or before `step`: (saved_step, state, measurements) or None"""
+        saved = [s for s in self.snapshots if s <= step]
+        if not saved:
+            return None
+        best = max(saved)
+        state, measurements = self.snapshots[best]
+        state = np.array(state) if isinstance(state, np.memmap) else state.copy()
+        return best, state, dict(measurements)
+
+    def nearest_step(self, step):
+        return max((s for s in self.snapshots if s <= step), default=-1)
+
+    def clear(self):
+        self.snapshots.clear()
+        self.current_bytes = 0
+
+    def _thin(self):
+        self.interval *= 2
+        dropped = [s for s in self.snapshots if (s + 1) % self.interval != 0]
+        if len(dropped) == len(self.snapshots):
+            dropped.remove(max(dropped))  # none on the new grid: keep the newest
+        for s in dropped:
+            state, _ = self.snapshots.pop(s)
+            self.current_bytes -= state.nbytes
+
+    def __len__(self):
+        return len(self.snapshots)
+
+
+class CheckpointedCircuit:
+    """
+    Step navigation of the Circuit classes (gui_version6, measurement_gate):
+    fused replay, goto_step over the checkpoint grid and measurement with
+    outcomes that are reused when a step is replayed.
+
+    Subclasses provide n, dtype, backend, diagram, step_index, measurements,
+    outcomes, checkpoints, executor, fuse_block_qubits and a `state` vector.
+    Engines other than a state vector (the stabilizer tableau) override the
+    hooks engine_state, set_engine_state, start_engine and undo_gate, and
+    extend apply_gates / measure_and_collapse / measure_qubits.
+    """
+
+    @property
+    def vector_backend(self):
+        return self.backend
+
+    def engine_state(self):
+        """What the checkpoints store: the state vector"""
+        return self.state
+
+    def set_engine_state(self, value):
+        self.state = value
+
+    def start_engine(self):
+        self.state = zero_state(self.n, self.dtype)
+
+    def undo_gate(self, step):
+        gate, targets, controls = self.diagram[step]
+        self.state = apply_inverse_named_gate(self.state, gate, targets, controls, self.n)
+
+    def apply_gates(self, start, stop):
+        """Apply diagram[start:stop] through a fused plan, one state sweep per fused op"""
+        plan = compile_diagram(self.diagram[start:stop], self.fuse_block_qubits, start)
+        for op in plan.ops:
+            if op.is_measurement:
+                self.measure_and_collapse(op.targets[0], op.steps[0])
+            else:
+                self.state = op.apply(self.state, self.n, self.vector_backend, self.executor)
+        return plan
+
+    def goto_step(self, target, progress=None):
+        """
+        Move to the state after diagram[target] (-1 = initial state).
+        Unitary steps are undone with their inverse; otherwise the nearest
+        checkpoint at or before target is restored and replayed forward, so a
+        move costs at most checkpoints.interval gate applications.
+        progress(step, target) is called between replay segments; returning
+        False stops the replay there (step_index stays consistent).
+        """
+        current = self.step_index
+        if target == current:
+            return
+        saved = self.checkpoints.nearest_step(target)
+        if target < current:
+            undo = range(current, target, -1)
+            if current - target <= target - saved and all(self.diagram[i][0] != "MEASURE" for i in undo):
+                for i in undo:
+                    self.undo_gate(i)
+                self.step_index = target
+                return
+        if target < current or saved > current:
+            self.restore_checkpoint(saved)
+
+        # replay in segments that end on the checkpoint grid
+        interval = self.checkpoints.interval
+        while self.step_index < target:
+            if progress is not None and not progress(self.step_index, target):
+                return
+            stop = min(target, (self.step_index + 1) // interval * interval + interval - 1)
+            self.apply_gates(self.step_index + 1, stop + 1)
+            self.step_index = stop
+            self.checkpoints.maybe_save(stop, self.engine_state(), self.measurements)
+
+    def restore_checkpoint(self, step):
+        snapshot = self.checkpoints.nearest(step)
+        if snapshot is None or step < 0:
+            self.start_engine()
+            self.measurements = {}
+            self.step_index = -1
+        else:
+            self.step_index, engine_state, self.measurements = snapshot
+            self.set_engine_state(engine_state)
+
+    def measure_and_collapse(self, q, step=None):
+        """Measure qubit q; a MEASURE step sampled before reuses its recorded outcome"""
+        if step in self.outcomes:
+            outcome = self.outcomes[step]
+        else:
+            probs = np.abs(self.state.flatten())**2
+            outcome = self.measure_qubit(probs, q)
+            if step is not None:
+                self.outcomes[step] = outcome
+        self.measurements[q] = outcome
+        self.state = self.collapse_state(q, outcome)
+
+    def measure_qubit(self, probs, qubit):
+        """Return simulated measurement result (0 or 1) for given qubit"""
+        outcome_probs = probs.reshape(2**qubit, 2, -1).sum(axis=(0, 2))
+        return 0 if random.random() < outcome_probs[0] else 1
+
+    def collapse_state(self, qubit, outcome):
+        """Collapse the state vector to the outcome on the given qubit"""
+        return collapse_to_outcome(self.state, [qubit], [outcome], self.n)
+
+    def measure_qubits(self, qubits):
+        """Measure several qubits at once; returns (outcomes, marginal probabilities)"""
+        outcomes, marginal, self.state = measure_qubits(self.state, qubits, self.n)
+        for q, outcome in zip(qubits, outcomes):
+            self.measurements[q] = outcome
+        return outcomes, marginal
+
+    def reset(self):
+        self.start_engine()
+        self.step_index = -1
+        self.measurements = {}
+        self.outcomes = {}
+        self.checkpoints.clear()
@@ -0,0 +1,150 @@
+# fusion.py
+import numpy as np
+from Basic_1 import (
+    GATES,
+    apply_single_qubit_gate,
+    apply_multi_qubit_gate,
+    apply_named_gate,
+    gate_operator,
+)
+
+
+class FusedOp:
+    """
+    One entry of a fused execution plan.
+    - matrix is None: run the original gate (gate, targets, controls) as is
+    - otherwise: apply `matrix` to `qubits` (first qubit = most significant)
+    `steps` lists the Circuit.diagram indices this op stands for.
+    """
+
+    def __init__(self, steps, qubits, matrix=None, gate=None, targets=(), controls=()):
+        self.steps = tuple(steps)
+        self.qubits = tuple(qubits)
+        self.matrix = matrix
+        self.gate = gate
+        self.targets = list(targets)
+        self.controls = list(controls)
+
+    @property
+    def is_measurement(self):
+        return self.gate == "MEASURE"
+
+    def apply(self, state, n_qubits, backend="kernel", executor=None):
+        if self.matrix is None:
+            if executor is not None and backend == "kernel":
+                return executor.apply_named_gate(state, self.gate, self.targets, self.controls, n_qubits)
+            return apply_named_gate(state, self.gate, self.targets, self.controls, n_qubits, backend)
+        if len(self.qubits) == 1:
+            if executor is not None:
+                return executor.apply_single_qubit_gate(state, self.matrix, self.qubits[0], n_qubits)
+            return apply_single_qubit_gate(state, self.matrix, self.qubits[0], n_qubits)
+        return apply_multi_qubit_gate(state, self.matrix, list(self.qubits), n_qubits)
+
+    def local_matrix(self, block_qubits):
+        """This op's unitary on the ordered qubits of an enclosing block"""
+        m = len(block_qubits)
+        local = {q: i for i, q in enumerate(block_qubits)}
+        if self.matrix is None:
+            return gate_operator(self.gate, [local[t] for t in self.targets],
+                                 [local[c] for c in self.controls], m)
+        return apply_multi_qubit_gate(np.eye(2**m, dtype=complex), self.matrix,
+                                      [local[q] for q in self.qubits], m)
+
+
+class FusedPlan:
+    """Ordered FusedOps plus the map from each original step to the op that covers it"""
+
+    def __init__(self, ops, n_steps, start=0):
+        self.ops = ops
+        self.start = start
+        self.step_to_op = [None] * n_steps
+        for j, op in enumerate(ops):
+            for s in op.steps:
+                self.step_to_op[s - start] = j
+
+    def op_for_step(self, step):
+        return self.step_to_op[step - self.start]
+
+    def __len__(self):
+        return len(self.ops)
+
+
+def _op_for_gate(step, gate, targets, controls):
+    if gate in GATES:
+        return FusedOp([step], targets, matrix=GATES[gate])
+    return FusedOp([step], list(controls) + list(targets), gate=gate, targets=targets, controls=controls)
+
+
+def _fuse_single_qubit_runs(diagram, start):
+    """Merge runs of single-qubit gates on each qubit into one 2x2 matrix"""
+    ops = []
+    pending = {}  # qubit -> FusedOp accumulated since the last gate touching it
+
+    def flush(qubit):
+        op = pending.pop(qubit, None)
+        if op is not None:
+            ops.append(op)
+
+    for step, (gate, targets, controls) in enumerate(diagram, start):
+        op = _op_for_gate(step, gate, targets, controls)
+        if gate in GATES:
+            q = targets[0]
+            prev = pending.get(q)
+            if prev is None:
+                pending[q] = op
+            else:
+                pending[q] = FusedOp(prev.steps + op.steps, [q], matrix=op.matrix @ prev.matrix)
+        else:
+            # gates on other qubits commute with this one, so only its own wires are flushed
+            for q in op.qubits:
+                flush(q)
+            ops.append(op)
+    for q in sorted(pending, key=lambda q: pending[q].steps[0]):
+        flush(q)
+    return ops
+
+
+def _fuse_blocks(ops, max_block_qubits):
+    """Greedily merge neighbouring unitary ops into blocks of at most max_block_qubits"""
+    fused = []
+    block, block_qubits = [], []
+
+    def flush():
+        if len(block) == 1:
+            fused.append(block[0])
+        elif block:
+            qubits = sorted(block_qubits)
+            U = np.eye(2**len(qubits), dtype=complex)
+            for op in block:
+                U = op.local_matrix(qubits) @ U
+            steps = sorted(s for op in block for s in op.steps)
+            fused.append(FusedOp(steps, qubits, matrix=U))
+        block.clear()
+        block_qubits.clear()
+
+    for op in ops:
+        if op.is_measurement:
+            flush()
+            fused.append(op)
+            continue
+        merged = set(block_qubits) | set(op.qubits)
+        if len(merged) > max_block_qubits:
+            flush()
+            merged = set(op.qubits)
+        block.append(op)
+        block_qubits[:] = merged
+    flush()
+    return fused
+
+
+def compile_diagram(diagram, max_block_qubits=1, start=0):
+    """
+    Compile a Circuit.diagram list into a FusedPlan.
+    max_block_qubits=1 only merges single-qubit runs; larger values also fuse
+    neighbouring gates into k-qubit blocks (k <= max_block_qubits).
+    `start` is the diagram index of diagram[0], so a slice can be compiled.
+    """
+    ops = _fuse_single_qubit_runs(diagram, start)
+    if max_block_qubits > 1:
+        ops = _fuse_blocks(ops, max_block_qubits)
+    return FusedPlan(ops, len(diagram), start)
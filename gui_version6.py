@@ -1,10 +1,20 @@
 import numpy as np
 import tkinter as tk
-from tkinter import messagebox, simpledialog
-from Basic_1 import zero_state, apply_single_qubit_gate, cnot_on_n_qubits, toffoli_on_n_qubits, H, X, Y, Z
+from tkinter import messagebox, simpledialog, filedialog
+from Basic_1 import zero_state, precision_dtype, apply_named_gate, bloch_vectors
+from checkpoints import CheckpointStore, CheckpointedCircuit
+from history_store import HistoryStore
+from parallel import ParallelExecutor
+from stabilizer import StabilizerState, CLIFFORD_GATES
+import circuit_io
+from profiler import Profiler, profiled
+from histogram import ProbabilityHistogram, MODES as HISTOGRAM_MODES
+from sim_worker import SimulationWorker
+from bloch_view import BlochView, MAX_SPHERES
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import random
+import queue
+import os
 
 # Aesthetic settings
 BG_COLOR = "#2E2E2E"
@@ -23,18 +33,113 @@ CELL_HEIGHT = 50
 TEXT_COLOR = "black"
 GATE_SPACING = 30
 
-class Circuit:
-    def __init__(self, n_qubits):
-        self.history = []  # list of (gate, probs, targets, controls)
+HIGHLIGHT_COLOR = "#FFD700"  # frame around the gate column of the current step
+
+WORKER_POLL_MS = 20  # how often the Tk thread checks for simulation results
+
+CIRCUIT_FILETYPES = [("OpenQASM", "*.qasm"), ("Binary circuit", "*.qsim"), ("All files", "*.*")]
+
+# Allocation tracking (tracemalloc) makes every allocation in the process several times
+# slower, so it is off unless QSIM_PROFILE_ALLOCATIONS=1 is set in the environment
+PROFILE_ALLOCATIONS = os.environ.get("QSIM_PROFILE_ALLOCATIONS", "0") == "1"
+
+# backend="auto" switches to the stabilizer tableau for Clifford-only circuits above this size
+AUTO_STABILIZER_QUBITS = 12
+
+def _gate_fields(circuit, index):
+    fields = {"step": index, "state_bytes": circuit.engine_state().nbytes}
+    if index < len(circuit.diagram):
+        fields["gate"] = circuit.diagram[index][0]
+    return fields
+
+
+def _state_fields(circuit, *args, **kwargs):
+    return {"step": circuit.step_index, "state_bytes": circuit.engine_state().nbytes}
+
+
+class Circuit(CheckpointedCircuit):
+    def __init__(self, n_qubits, backend="auto", history=None, workers=1, precision=None):
+        # (gate, probs, targets, controls) per applied gate, stored compactly
+        self.history = history if history is not None else HistoryStore(2**n_qubits)
         self.n = n_qubits
-        self.state = zero_state(n_qubits)
+        # "kernel" (matrix-free), "dense" or "sparse" (cached operators), "stabilizer" (tableau),
+        # or "auto": the tableau while the diagram is Clifford-only and large, else "kernel"
+        self.backend = backend
+        self.fuse_block_qubits = 1  # largest gate block apply_gates fuses
+        self.executor = ParallelExecutor(workers) if workers > 1 else None  # thread pool for kernels
+        # "double" (complex128) or "single" (complex64); None follows Basic_1.set_precision
+        self.precision = precision
+        self.dtype = precision_dtype(precision)
         self.diagram = []  # list of gate info tuples
         self.step_index = -1  # for step-by-step simulation
         self.measurements = {}  # record {qubit: outcome}
+        self.outcomes = {}  # {MEASURE step: sampled outcome}, reused when a step is replayed
+        self.checkpoints = CheckpointStore()
+        self._clifford_checked = 0  # diagram entries already checked for non-Clifford gates
+        self._clifford = True
+        self.profiler = None  # profiler.Profiler recording apply_gate / goto_step spans
+        self.start_engine()
 
     def add_gate(self, gate, targets, controls=[]):
         self.diagram.append((gate, targets, controls))
 
+    def close(self):
+        """Stop the kernel thread pool; call once the circuit is no longer simulated"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    @property
+    def state(self):
+        """State vector; expanded from the tableau when the stabilizer backend is active"""
+        if self.tableau is not None:
+            return self.tableau.to_statevector()
+        return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+
+    @property
+    def vector_backend(self):
+        return "kernel" if self.backend in ["auto", "stabilizer"] else self.backend
+
+    def is_clifford(self):
+        for gate, _, _ in self.diagram[self._clifford_checked:]:
+            if gate not in CLIFFORD_GATES:
+                self._clifford = False
+        self._clifford_checked = len(self.diagram)
+        return self._clifford
+
+    def wants_stabilizer(self):
+        if self.backend == "stabilizer":
+            return True
+        return self.backend == "auto" and self.n > AUTO_STABILIZER_QUBITS and self.is_clifford()
+
+    def start_engine(self):
+        """Fresh |0...0> on the tableau or as a state vector, whichever the backend wants"""
+        if self.wants_stabilizer():
+            self.tableau = StabilizerState(self.n)
+            self._state = None
+        else:
+            self.tableau = None
+            self._state = zero_state(self.n, self.dtype)
+
+    def leave_stabilizer(self):
+        """Continue on a state vector once a non-Clifford gate shows up"""
+        self._state = self.tableau.to_statevector().astype(self.dtype)
+        self.tableau = None
+        self.checkpoints.clear()  # the snapshots are tableaux
+
+    def engine_state(self):
+        return self.tableau if self.tableau is not None else self._state
+
+    def set_engine_state(self, value):
+        if isinstance(value, StabilizerState):
+            self.tableau = value
+        else:
+            self._state = value
+
     """def apply_gate(self, index):
         if index >= len(self.diagram):
             return
@@ -54,56 +159,229 @@ class Circuit:
             outcome = self.measure_qubit(probs, q)
             self.measurements[q] = outcome
             self.state = self.collapse_state(q, outcome)"""
+    @profiled("simulation", after=_gate_fields)
     def apply_gate(self, index):
         if index >= len(self.diagram):
             return
         gate, targets, controls = self.diagram[index]
+        if self.tableau is not None and not self.wants_stabilizer():
+            self.leave_stabilizer()
 
-        if gate in ["H", "X", "Y", "Z"]:
-            self.state = apply_single_qubit_gate(
-                self.state, {"H": H, "X": X, "Y": Y, "Z": Z}[gate], targets[0], self.n)
-        elif gate == "CNOT":
-            self.state = cnot_on_n_qubits(control=controls[0], target=targets[0], n_qubits=self.n) @ self.state
-        elif gate == "TOFFOLI":
-            self.state = toffoli_on_n_qubits(control1=controls[0], control2=controls[1],
-                                             target=targets[0], n_qubits=self.n) @ self.state
-        elif gate == "MEASURE":
-            q = targets[0]
+        if gate == "MEASURE":
+            self.measure_and_collapse(targets[0], index)
+        elif self.tableau is not None:
+            self.tableau.apply(gate, targets, controls)
+        else:
+            if self.executor is not None and self.vector_backend == "kernel":
+                self.state = self.executor.apply_named_gate(self.state, gate, targets, controls, self.n)
+            else:
+                self.state = apply_named_gate(self.state, gate, targets, controls, self.n, self.vector_backend)
+        self.checkpoints.maybe_save(index, self.engine_state(), self.measurements)
+
+        # save probability distribution (not kept for tableau runs, which may be far too wide)
+        if self.tableau is None:
             probs = np.abs(self.state.flatten())**2
-            outcome = self.measure_qubit(probs, q)
+            self.history.append((gate, probs.copy(), targets, controls))
+
+
+
+    def undo_gate(self, step):
+        if self.tableau is None:
+            return super().undo_gate(step)
+        gate, targets, controls = self.diagram[step]
+        self.tableau.apply(gate, targets, controls)  # Clifford gates here are self-inverse
+
+    def apply_gates(self, start, stop):
+        """Apply diagram[start:stop] through a fused plan, one state sweep per fused op"""
+        if self.tableau is not None and not self.wants_stabilizer():
+            self.leave_stabilizer()
+        if self.tableau is None:
+            return super().apply_gates(start, stop)
+        # tableau gates are O(n) column updates, there is nothing to fuse
+        for step in range(start, stop):
+            gate, targets, controls = self.diagram[step]
+            if gate == "MEASURE":
+                self.measure_and_collapse(targets[0], step)
+            else:
+                self.tableau.apply(gate, targets, controls)
+        return None
+
+    @profiled("simulation", after=_state_fields)
+    def goto_step(self, target, progress=None):
+        """CheckpointedCircuit.goto_step, profiled"""
+        return super().goto_step(target, progress)
+
+    def measure_and_collapse(self, q, step=None):
+        """Measure qubit q; a MEASURE step sampled before reuses its recorded outcome"""
+        if self.tableau is None:
+            return super().measure_and_collapse(q, step)
+        outcome = self.tableau.measure(q, outcome=self.outcomes.get(step))
+        if step is not None:
+            self.outcomes[step] = outcome
+        self.measurements[q] = outcome
+
+    def measure_qubits(self, qubits):
+        """Measure several qubits at once; returns (outcomes, marginal probabilities)"""
+        if self.tableau is None:
+            return super().measure_qubits(qubits)
+        marginal = self.tableau.marginal_probabilities(qubits)
+        outcomes = [self.tableau.measure(q) for q in qubits]
+        for q, outcome in zip(qubits, outcomes):
             self.measurements[q] = outcome
-            self.state = self.collapse_state(q, outcome)
-
-        # save probability distribution
-        probs = np.abs(self.state.flatten())**2
-        self.history.append((gate, probs.copy(), targets, controls))
-
-
-
-    def measure_qubit(self, probs, qubit):
-        """Return simulated measurement result (0 or 1) for given qubit"""
-        n = self.n
-        outcome_probs = [0, 0]
-        for i, p in enumerate(probs):
-            bit = (i >> (n-1-qubit)) & 1
-            outcome_probs[bit] += p
-        return 0 if random.random() < outcome_probs[0] else 1
-
-    def collapse_state(self, qubit, outcome):
-        """Collapse the state vector to the outcome on the given qubit"""
-        new_state = self.state.copy()
-        n = self.n
-        for i in range(len(new_state)):
-            bit = (i >> (n-1-qubit)) & 1
-            if bit != outcome:
-                new_state[i] = 0
-        norm = np.linalg.norm(new_state)
-        return new_state / norm if norm > 0 else new_state
-
-    def reset(self):
-        self.state = zero_state(self.n)
-        self.step_index = -1
-        self.measurements = {}
+        return outcomes, marginal
+
+    def qubit_probabilities(self):
+        """P(|1>) of every qubit, without expanding a tableau into a state vector"""
+        if self.tableau is not None:
+            return self.tableau.qubit_probabilities()
+        probs = (np.abs(self.state)**2).reshape((2,) * self.n)
+        return np.array([probs.sum(axis=tuple(a for a in range(self.n) if a != q))[1] for q in range(self.n)])
+
+    def bloch_vectors(self, qubits=None):
+        """Bloch vectors of `qubits` (default all), shape (len, 3); read off the tableau when there is one"""
+        qubits = list(range(self.n)) if qubits is None else list(qubits)
+        if self.tableau is not None:
+            return self.tableau.bloch_vectors(qubits)
+        return bloch_vectors(self.state, self.n)[qubits]
+
+
+class CircuitRenderer:
+    """
+    Retained-mode drawing of a Circuit.diagram on a tk.Canvas. Each gate column
+    is drawn once, tagged ("gate", "col<i>"), and only while it is in or near
+    the visible part of the scroll region; columns scrolled far away are
+    deleted again. Adding a gate draws at most one column, stepping moves the
+    highlight frame and zooming rescales the existing items with canvas.scale,
+    so the cost of an interaction does not grow with the number of gates.
+    """
+
+    MARGIN_COLUMNS = 4  # columns drawn beyond each edge of the view
+
+    def __init__(self, canvas, circuit, scale=1.0):
+        self.canvas = canvas
+        self.circuit = circuit
+        self.scale = scale
+        self.drawn = set()  # columns that currently have canvas items
+        self.n_columns = 0  # diagram length the scroll region and wires are sized for
+        self.wires = []
+        self.highlight = None
+        self._render_pending = False
+        self.rebuild()
+
+    # Unscaled layout (same as the original full redraw) times the zoom factor
+    def column_x(self, col):
+        return (50 + col * (CELL_WIDTH + GATE_SPACING)) * self.scale
+
+    def qubit_y(self, q):
+        return (30 + q * CELL_HEIGHT) * self.scale
+
+    def size(self):
+        sw = int((self.n_columns * (CELL_WIDTH + GATE_SPACING) + 200) * self.scale)
+        sh = int((self.circuit.n * CELL_HEIGHT + 100) * self.scale)
+        return sw, sh
+
+    def rebuild(self):
+        """Start over, e.g. after a different circuit was loaded"""
+        self.canvas.delete("all")
+        self.canvas.configure(bg=BG_COLOR)
+        self.drawn.clear()
+        self.highlight = self.canvas.create_rectangle(0, 0, 0, 0, outline=HIGHLIGHT_COLOR, width=2,
+                                                      state="hidden", tags=("highlight",))
+        self.wires = [self.canvas.create_line(0, 0, 0, 0, width=2, fill=FG_COLOR, tags=("wire",))
+                      for _ in range(self.circuit.n)]
+        self.n_columns = 0
+        self._resize()
+        self.sync()
+
+    def sync(self):
+        """Catch up with the circuit: new gates, the current step and the visible columns"""
+        n_columns = len(self.circuit.diagram)
+        if n_columns < self.n_columns or len(self.wires) != self.circuit.n:
+            self.rebuild()
+            return
+        if n_columns != self.n_columns:
+            self.n_columns = n_columns
+            self._resize()
+        self.render_visible()
+        self._move_highlight()
+
+    def set_scale(self, scale):
+        """Zoom the items already drawn instead of recreating them"""
+        factor = scale / self.scale
+        self.scale = scale
+        self.canvas.scale("all", 0, 0, factor, factor)
+        self.canvas.itemconfigure("label", font=(FONT_FAMILY, max(1, int(FONT_SIZE_BOLD * scale)), "bold"))
+        self._resize()
+        self.render_visible()
+
+    def _resize(self):
+        sw, sh = self.size()
+        self.canvas.config(scrollregion=(0, 0, sw, sh))
+        for q, wire in enumerate(self.wires):
+            y = self.qubit_y(q)
+            self.canvas.coords(wire, 50 * self.scale, y, sw - 50 * self.scale, y)
+
+    def visible_columns(self):
+        width = max(self.canvas.winfo_width(), int(self.canvas.cget("width")))
+        left, right = self.canvas.canvasx(0), self.canvas.canvasx(width)
+        pitch = (CELL_WIDTH + GATE_SPACING) * self.scale
+        first = int((left - 50 * self.scale) // pitch) - self.MARGIN_COLUMNS
+        last = int((right - 50 * self.scale) // pitch) + self.MARGIN_COLUMNS
+        return max(0, first), min(self.n_columns - 1, last)
+
+    def render_visible(self):
+        first, last = self.visible_columns()
+        for col in [c for c in self.drawn if c < first or c > last]:
+            self.canvas.delete(f"col{col}")
+            self.drawn.discard(col)
+        for col in range(first, last + 1):
+            if col not in self.drawn:
+                self.draw_column(col)
+
+    def schedule_render(self):
+        """Render once when Tk is idle, however many scroll events arrive before that"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.canvas.after_idle(self._render_now)
+
+    def _render_now(self):
+        self._render_pending = False
+        self.render_visible()
+
+    def _move_highlight(self):
+        step = self.circuit.step_index
+        if step < 0 or step >= self.n_columns:
+            self.canvas.itemconfigure(self.highlight, state="hidden")
+            return
+        s = self.scale
+        x = self.column_x(step)
+        self.canvas.coords(self.highlight, x - 30 * s, 10 * s, x + 60 * s, self.qubit_y(self.circuit.n - 1) + 20 * s)
+        self.canvas.itemconfigure(self.highlight, state="normal")
+        self.canvas.tag_raise(self.highlight, "wire")
+
+    def draw_column(self, col):
+        gate, targets, controls = self.circuit.diagram[col]
+        s = self.scale
+        x = self.column_x(col)
+        tags = ("gate", f"col{col}")
+        font = (FONT_FAMILY, max(1, int(FONT_SIZE_BOLD * s)), "bold")
+
+        for c in controls:
+            y = self.qubit_y(c)
+            self.canvas.create_oval(x + 15*s, y - 5*s, x + 25*s, y + 5*s, fill=CONTROL_COLOR, tags=tags)
+
+        if controls and targets:
+            y1 = self.qubit_y(min(controls + targets))
+            y2 = self.qubit_y(max(controls + targets))
+            self.canvas.create_line(x + 20*s, y1, x + 20*s, y2, width=2, fill=FG_COLOR, tags=tags)
+
+        for t in targets:
+            y = self.qubit_y(t)
+            fill, text = (MEASURE_COLOR, "M") if gate == "MEASURE" else (GATE_COLOR, gate)
+            self.canvas.create_rectangle(x - 25*s, y - 15*s, x + 55*s, y + 15*s,
+                                         fill=fill, outline="black", width=2, tags=tags)
+            self.canvas.create_text(x + 15*s, y, text=text, font=font, tags=tags + ("label",))
+        self.drawn.add(col)
 
 
 class QuantumGUI:
@@ -113,8 +391,20 @@ class QuantumGUI:
                                      font=(FONT_FAMILY, FONT_SIZE_NORMAL))
         self.status_label.grid(row=5, column=0, pady=5)
 
+        # live time breakdown of the last action, next to the status line
+        self.profile_label = tk.Label(root, text="", bg=BG_COLOR, fg=FG_COLOR,
+                                      font=(FONT_FAMILY, FONT_SIZE_NORMAL))
+        self.profile_label.grid(row=6, column=0, pady=(0, 5))
+
         self.root = root
         self.circuit = circuit
+        self.profiler = Profiler(trace_allocations=PROFILE_ALLOCATIONS)
+        circuit.profiler = self.profiler
+        # simulation runs on a background thread; the Tk thread polls for results
+        self.worker = SimulationWorker(circuit)
+        self.bloch_view = None  # BlochView while its window is open
+        self.target_step = circuit.step_index
+        root.after(WORKER_POLL_MS, self.poll_worker)
         self.root.title("Quantum Circuit Simulator")
         self.root.configure(bg=BG_COLOR)
 
@@ -140,7 +430,9 @@ class QuantumGUI:
         # Scrollbars
         self.hbar = tk.Scrollbar(self.canvas_frame, orient="horizontal", command=self.canvas.xview)
         self.vbar = tk.Scrollbar(self.canvas_frame, orient="vertical", command=self.canvas.yview)
-        self.canvas.config(xscrollcommand=self.hbar.set, yscrollcommand=self.vbar.set)
+        self.renderer = CircuitRenderer(self.canvas, circuit, self.scale)
+        self.canvas.config(xscrollcommand=self.on_xscroll, yscrollcommand=self.vbar.set)
+        self.canvas.bind("<Configure>", lambda event: self.renderer.schedule_render())
 
         # Controls
         self.control_frame = tk.Frame(root, bg=BG_COLOR)
@@ -156,6 +448,13 @@ class QuantumGUI:
         self.ax.spines['right'].set_color(FG_COLOR)
         self.prob_canvas = FigureCanvasTkAgg(self.fig, master=root)
         self.prob_canvas.get_tk_widget().grid(row=3, column=0)
+        self.histogram = ProbabilityHistogram(self.fig, self.ax, self.prob_canvas,
+                                              color=GATE_COLOR, fg=FG_COLOR, bg=BG_COLOR)
+        self.histogram_mode = tk.StringVar(root, value=self.histogram.mode)
+        mode_menu = tk.OptionMenu(self.control_frame, self.histogram_mode, *HISTOGRAM_MODES,
+                                  command=self.set_histogram_mode)
+        mode_menu.config(bg=BUTTON_BG, fg=BUTTON_FG, font=(FONT_FAMILY, FONT_SIZE_NORMAL))
+        mode_menu.grid(row=0, column=len(self.control_frame.grid_slaves(row=0)), padx=5)
 
         # Measurement results label
         self.measure_label = tk.Label(root, text="Measurements: None", bg=BG_COLOR, fg=FG_COLOR, font=(FONT_FAMILY, FONT_SIZE_NORMAL))
@@ -178,7 +477,11 @@ class QuantumGUI:
             ("Zoom In (+)", self.zoom_in),
             ("Zoom Out (-)", self.zoom_out),
             ("Reset Zoom", self.reset_zoom),
-            ("History", self.history)
+            ("History", self.history),
+            ("Bloch", self.show_bloch),
+            ("Save", self.save_circuit),
+            ("Load", self.load_circuit),
+            ("Export Trace", self.export_trace)
         ]
         for i, (text, command) in enumerate(buttons):
             b = tk.Button(self.control_frame, text=text, command=command,
@@ -250,23 +553,23 @@ class QuantumGUI:
 
         return result[0]
 
+    @profiled("canvas")
     def update_canvas(self):
-        self.canvas.delete("all")
-        self.canvas.configure(bg=BG_COLOR)
-        n = self.circuit.n
-
-        # Apply scaling
-        sw = int((len(self.circuit.diagram) * (CELL_WIDTH + GATE_SPACING) + 200) * self.scale)
-        sh = int((n * CELL_HEIGHT + 100) * self.scale)
+        self.root.after_idle(self.show_profile)
+        self.renderer.sync()
+        self.update_scrollbars()
+        self.update_probabilities()
+        self.update_measurements()
+        self.update_bloch()
 
-        # Scrollbars control
+    def update_scrollbars(self):
+        sw, sh = self.renderer.size()
         MAX_INITIAL_WIDTH = 1000
         self.canvas.config(width=MAX_INITIAL_WIDTH)
         if sw > MAX_INITIAL_WIDTH:
             self.hbar.pack(side="bottom", fill="x")
         else:
             self.hbar.pack_forget()
-        self.canvas.config(scrollregion=(0, 0, sw, sh))
 
         if sh < self.screen_height - 200:
             self.canvas.config(height=sh)
@@ -274,46 +577,10 @@ class QuantumGUI:
         else:
             self.canvas.config(height=self.screen_height - 200)
             self.vbar.pack(side="right", fill="y")
-            self.canvas.config(scrollregion=(0, 0, sw, sh))
-
-        # Draw wires
-        for i in range(n):
-            y = int((30 + i * CELL_HEIGHT) * self.scale)
-            self.canvas.create_line(50*self.scale, y, sw - 50*self.scale, y, width=2, fill=FG_COLOR)
-
-        # Draw gates
-        for col, gate_info in enumerate(self.circuit.diagram):
-            gate, targets, controls = gate_info
-            x = int((50 + col * (CELL_WIDTH + GATE_SPACING)) * self.scale)
-
-            for c in controls:
-                y = int((30 + c * CELL_HEIGHT) * self.scale)
-                self.canvas.create_oval(x+15*self.scale, y-5*self.scale,
-                                        x+25*self.scale, y+5*self.scale,
-                                        fill=CONTROL_COLOR)
-
-            if controls and targets:
-                y1 = int((30 + min(controls + targets) * CELL_HEIGHT) * self.scale)
-                y2 = int((30 + max(controls + targets) * CELL_HEIGHT) * self.scale)
-                self.canvas.create_line(x+20*self.scale, y1, x+20*self.scale, y2, width=2, fill=FG_COLOR)
-
-            for t in targets:
-                y = int((30 + t * CELL_HEIGHT) * self.scale)
-                if gate == "MEASURE":
-                    self.canvas.create_rectangle(x-25*self.scale, y-15*self.scale,
-                                                 x+55*self.scale, y+15*self.scale,
-                                                 fill=MEASURE_COLOR, outline="black", width=2)
-                    self.canvas.create_text(x+15*self.scale, y, text="M",
-                                            font=(FONT_FAMILY, int(FONT_SIZE_BOLD*self.scale), "bold"))
-                else:
-                    self.canvas.create_rectangle(x-25*self.scale, y-15*self.scale,
-                                                 x+55*self.scale, y+15*self.scale,
-                                                 fill=GATE_COLOR, outline="black", width=2)
-                    self.canvas.create_text(x+15*self.scale, y, text=gate,
-                                            font=(FONT_FAMILY, int(FONT_SIZE_BOLD*self.scale), "bold"))
 
-        self.update_probabilities()
-        self.update_measurements()
+    def on_xscroll(self, *args):
+        self.hbar.set(*args)
+        self.renderer.schedule_render()
 
     """def update_probabilities(self):
         self.ax.clear()
@@ -325,23 +592,42 @@ class QuantumGUI:
         self.ax.set_facecolor(BG_COLOR)
         self.fig.patch.set_facecolor(BG_COLOR)
         self.prob_canvas.draw()"""
+    @profiled("plot")
     def update_probabilities(self):
-        self.ax.clear()
-        probs = np.abs(self.circuit.state.flatten())**2
-        n = self.circuit.n
-        labels = [format(i, f'0{n}b') for i in range(len(probs))]
+        # the histogram, Bloch spheres and measurements read the circuit, which the
+        # worker may be changing; poll_worker refreshes them once it answers
+        if self.worker.busy:
+            return
+        if self.circuit.tableau is not None:
+            # tableau runs can be far too wide for 2^n bars: show P(|1>) per qubit instead
+            self.histogram.update_marginal(self.circuit.qubit_probabilities())
+        else:
+            probs = np.abs(self.circuit.state.reshape(-1))**2
+            self.histogram.update(probs, self.circuit.n)
+
+    def set_histogram_mode(self, mode):
+        self.histogram.set_mode(mode)
+        self.update_probabilities()
 
-        self.ax.bar(labels, probs, color=GATE_COLOR)
-        self.ax.set_ylim(0, 1)
-        self.ax.set_ylabel("Probability", color=FG_COLOR)
-        self.ax.set_xlabel("Basis state", color=FG_COLOR)
-        self.ax.set_facecolor(BG_COLOR)
-        self.fig.patch.set_facecolor(BG_COLOR)
 
-        self.prob_canvas.draw()
+    # Per-qubit Bloch spheres, kept in step with the circuit while the window is open
+    def show_bloch(self):
+        if self.bloch_view is not None and self.bloch_view.open:
+            self.bloch_view.window.lift()
+            return
+        self.bloch_view = BlochView(self.root, self.circuit.n, bg=BG_COLOR, fg=FG_COLOR, color=GATE_COLOR)
+        self.update_bloch()
 
+    @profiled("plot")
+    def update_bloch(self):
+        if self.bloch_view is None or not self.bloch_view.open or self.worker.busy:
+            return
+        n = self.circuit.n
+        self.bloch_view.update(self.circuit.bloch_vectors(range(min(n, MAX_SPHERES))), n)
 
     def update_measurements(self):
+        if self.worker.busy:
+            return
         if self.circuit.measurements:
             text = ", ".join([f"q{q}={r}" for q,r in self.circuit.measurements.items()])
         else:
@@ -355,15 +641,55 @@ class QuantumGUI:
         self.circuit.step_index += 1
         self.circuit.apply_gate(self.circuit.step_index)
         self.update_canvas()"""
+    # Stepping runs on self.worker; target_step is the step the user asked for last
+    @profiled("gui")
     def next_gate(self):
-        if self.circuit.step_index+1 >= len(self.circuit.diagram):
+        if self.target_step + 1 >= len(self.circuit.diagram):
             messagebox.showinfo("Info", "No more gates to apply.")
             return
-        self.circuit.step_index += 1
-        gate, targets, controls = self.circuit.diagram[self.circuit.step_index]
-        self.circuit.apply_gate(self.circuit.step_index)
+        self.target_step += 1
+        self.worker.goto(self.target_step)
 
-        # Update status label
+    @profiled("gui")
+    def prev_gate(self):
+        if self.target_step < 0:
+            messagebox.showinfo("Info", "At initial state.")
+            return
+        self.target_step -= 1
+        self.worker.goto(self.target_step)
+
+    @profiled("gui")
+    def reset_circuit(self):
+        self.target_step = -1
+        self.worker.reset()
+
+    def poll_worker(self):
+        """Handle worker messages; only the answer to the newest request gets rendered"""
+        done = None
+        while True:
+            try:
+                event = self.worker.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                _, step, target = event
+                self.status_label.config(text=f"Simulating... step {step + 1} of {target + 1}")
+            elif event[-1] == self.worker.submitted:
+                # the worker is idle now, so the circuit can be read safely
+                if event[0] == "error":
+                    messagebox.showerror("Error", event[1])
+                self.target_step = self.circuit.step_index
+                done = self.target_step
+        if done is not None:
+            self.show_step_status(done)
+            self.update_canvas()
+        self.root.after(WORKER_POLL_MS, self.poll_worker)
+
+    def show_step_status(self, step):
+        if step < 0:
+            self.status_label.config(text="Last Gate Applied: None")
+            return
+        gate, targets, controls = self.circuit.diagram[step]
         if gate in ["H", "X", "Y", "Z"]:
             self.status_label.config(text=f"Last Gate Applied: {gate} on q{targets[0]}")
         elif gate == "CNOT":
@@ -373,42 +699,93 @@ class QuantumGUI:
         elif gate == "MEASURE":
             self.status_label.config(text=f"Last Gate Applied: Measurement on q{targets[0]}")
 
-        self.update_canvas()
-
-
-    def prev_gate(self):
-        if self.circuit.step_index < 0:
-            messagebox.showinfo("Info", "At initial state.")
-            return
-        self.circuit.reset()
-        for i in range(self.circuit.step_index):
-            self.circuit.apply_gate(i)
-        self.circuit.step_index -= 1
-        self.update_canvas()
-
-    def reset_circuit(self):
-        self.circuit.reset()
-        self.update_canvas()
-
     # Zoom functions
     def zoom_in(self):
         self.scale *= 1.2
-        self.update_canvas()
+        self.apply_zoom()
 
     def zoom_out(self):
         self.scale /= 1.2
         if self.scale < 0.3:  # prevent too tiny
             self.scale = 0.3
-        self.update_canvas()
+        self.apply_zoom()
 
     def reset_zoom(self):
         self.scale = 1.0
-        self.update_canvas()
+        self.apply_zoom()
+
+    @profiled("canvas")
+    def apply_zoom(self):
+        self.renderer.set_scale(self.scale)
+        self.update_scrollbars()
     
     def history(self):
         from history_viewer import show_history
         show_history(self.root, self.circuit)
 
+    # Time spent in the last action, per part (from the profiler spans)
+    def show_profile(self):
+        parts = self.profiler.breakdown()
+        if not parts:
+            return
+        root, _ = self.profiler.last_action()
+        text = " | ".join(f"{cat} {sec * 1e3:.1f} ms" for cat, sec in parts.items() if cat != "total")
+        text += f" | total {parts['total'] * 1e3:.1f} ms"
+        if not self.worker.busy:
+            text += f" | state {self.circuit.engine_state().nbytes / 2**10:.0f} KiB"
+        if "peak_bytes" in root["args"]:
+            text += f" | peak {root['args']['peak_bytes'] / 2**20:.1f} MiB"
+        move, _ = self.profiler.last_action(self.worker.thread.ident)
+        if move is not None:
+            text += f" | worker {move['duration'] * 1e3:.1f} ms"
+        self.profile_label.config(text=text)
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(parent=self.root, defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if not path:
+            return
+        try:
+            self.profiler.export_chrome_trace(path)
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.status_label.config(text=f"Exported {len(self.profiler.events)} trace events")
+
+    # Save / load the diagram as .qasm (text) or .qsim (binary)
+    def save_circuit(self):
+        path = filedialog.asksaveasfilename(parent=self.root, defaultextension=".qasm",
+                                            filetypes=CIRCUIT_FILETYPES)
+        if not path:
+            return
+        try:
+            circuit_io.save_circuit(path, self.circuit.diagram, self.circuit.n)
+        except OSError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.status_label.config(text=f"Saved {len(self.circuit.diagram)} gates")
+
+    def load_circuit(self):
+        path = filedialog.askopenfilename(parent=self.root, filetypes=CIRCUIT_FILETYPES)
+        if not path:
+            return
+        try:
+            n, diagram = circuit_io.load_circuit(path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Error", f"Could not load circuit: {e}")
+            return
+        old = self.circuit
+        workers = old.executor.workers if old.executor is not None else 1
+        self.circuit = Circuit(n, old.backend, workers=workers, precision=old.precision)
+        self.circuit.diagram = diagram
+        self.circuit.profiler = self.profiler
+        self.renderer.circuit = self.circuit
+        self.renderer.rebuild()
+        self.worker.set_circuit(self.circuit)
+        self.target_step = -1
+        self.status_label.config(text=f"Loaded {len(diagram)} gates on {n} qubits")
+        self.update_canvas()
+
 
 
 def start_quantum_gui(parent, n_qubits):
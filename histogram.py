@@ -0,0 +1,137 @@
+# histogram.py
+import numpy as np
+
+MODES = ["auto", "full", "topk", "binned", "marginal"]
+DEFAULT_MAX_BARS = 64
+DEFAULT_TOP_K = 16
+
+
+class ProbabilityHistogram:
+    """
+    Probability bar chart that keeps its bar artists between updates.
+    The bars are animated artists: a full draw only happens when the layout
+    (mode or number of bars) changes; otherwise the bar heights (and top-K
+    labels) are updated and blitted over the cached axes background, so the
+    refresh cost depends on the number of bars, never on 2^n.
+
+    Modes:
+    - "full":     one bar per basis state (only up to max_bars states)
+    - "topk":     the top_k most likely basis states (argpartition, no full sort)
+    - "binned":   2^n states folded into max_bars bins of consecutive indices
+    - "marginal": P(|1>) of every qubit
+    - "auto":     "full" when 2^n <= max_bars, else "topk"
+    """
+
+    def __init__(self, fig, ax, canvas, mode="auto", max_bars=DEFAULT_MAX_BARS, top_k=DEFAULT_TOP_K,
+                 color="C0", fg="black", bg="white"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.fig, self.ax, self.canvas = fig, ax, canvas
+        self.mode = mode
+        self.max_bars = max_bars
+        self.top_k = top_k
+        self.color, self.fg, self.bg = color, fg, bg
+        self.layout = None
+        self.bars = []
+        self.labels = []  # in-axes text labels of the top-K bars
+        self.background = None
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def set_mode(self, mode):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.mode = mode
+
+    def effective_mode(self, n_qubits):
+        if self.mode == "auto":
+            return "full" if 2**n_qubits <= self.max_bars else "topk"
+        if self.mode == "full" and 2**n_qubits > self.max_bars:
+            return "binned"
+        return self.mode
+
+    # --- data for each mode ---
+    def _full(self, probs, n):
+        return probs, [format(i, f'0{n}b') for i in range(probs.size)], "Basis state"
+
+    def _topk(self, probs, n):
+        k = min(self.top_k, probs.size)
+        idx = np.argpartition(probs, probs.size - k)[probs.size - k:]
+        idx = idx[np.argsort(probs[idx])[::-1]]  # sorts only the k picked entries
+        return probs[idx], [format(int(i), f'0{n}b') for i in idx], f"Top {k} basis states"
+
+    def _binned(self, probs, n):
+        bins = min(self.max_bars, probs.size)
+        prefix = int(np.log2(bins))
+        labels = [format(b, f'0{prefix}b') + "*" for b in range(bins)] if prefix else ["*"]
+        return probs.reshape(bins, -1).sum(axis=1), labels, f"Basis states by leading {prefix} bits"
+
+    def _marginal(self, probs, n):
+        ones = [probs.reshape(2**q, 2, -1)[:, 1].sum() for q in range(n)]
+        return np.array(ones), [f"q{q}" for q in range(n)], "Qubit (P of |1>)"
+
+    # --- drawing ---
+    def update(self, probs, n_qubits):
+        """Show a probability vector of length 2^n_qubits"""
+        probs = np.asarray(probs, dtype=float).reshape(-1)
+        mode = self.effective_mode(n_qubits)
+        heights, labels, xlabel = getattr(self, "_" + mode)(probs, n_qubits)
+        self._show(mode, heights, labels, xlabel)
+
+    def update_marginal(self, qubit_probs):
+        """Show per-qubit P(|1>) directly (e.g. from a stabilizer tableau)"""
+        n = len(qubit_probs)
+        self._show("marginal", np.asarray(qubit_probs, dtype=float), [f"q{q}" for q in range(n)], "Qubit (P of |1>)")
+
+    def _show(self, mode, heights, labels, xlabel):
+        layout = (mode, len(heights), None if mode == "topk" else tuple(labels))
+        if layout != self.layout:
+            self._build(mode, heights, labels, xlabel)
+            self.layout = layout
+            self.canvas.draw()  # _on_draw caches the background and draws the bars
+            return
+        for bar, h in zip(self.bars, heights):
+            bar.set_height(h)
+        for text, label in zip(self.labels, labels):
+            text.set_text(label)
+        self._blit()
+
+    def _build(self, mode, heights, labels, xlabel):
+        ax = self.ax
+        ax.clear()
+        x = np.arange(len(heights))
+        self.bars = list(ax.bar(x, heights, color=self.color, animated=True))
+        self.labels = []
+        if mode == "topk":
+            # the labels change every step, so they live inside the blitted area
+            ax.set_xticks([])
+            self.labels = [ax.text(i, 0.02, label, rotation=90, ha="center", va="bottom",
+                                   color=self.fg, fontsize=7, animated=True)
+                           for i, label in zip(x, labels)]
+        else:
+            step = max(1, len(labels) // 16)  # at most ~16 tick labels
+            ax.set_xticks(x[::step])
+            ax.set_xticklabels(labels[::step], rotation=90 if len(labels) > 8 else 0, fontsize=7)
+        ax.set_xlim(-0.5, len(heights) - 0.5)
+        ax.set_ylim(0, 1)
+        ax.set_ylabel("Probability", color=self.fg)
+        ax.set_xlabel(xlabel, color=self.fg)
+        ax.set_facecolor(self.bg)
+        ax.tick_params(colors=self.fg)
+        self.fig.patch.set_facecolor(self.bg)
+
+    def _animated(self):
+        return self.bars + self.labels
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self._animated():
+            self.ax.draw_artist(artist)
+
+    def _blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self._animated():
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
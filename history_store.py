@@ -0,0 +1,169 @@
+# history_store.py
+import threading
+import numpy as np
+
+ENCODINGS = ["float32", "sparse", "topk"]
+
+
+class HistoryStore:
+    """
+    Probability history of a circuit, one entry per applied gate.
+    Behaves like the old list of (gate, probs, targets, controls) tuples
+    (append, len, indexing, iteration) but stores probabilities compactly:
+    - "float32": the full vector in single precision
+    - "sparse":  indices/values above `threshold`, or float32 if that is smaller
+    - "topk":    the `top_k` largest probabilities (argpartition, no full sort)
+    With `spill_path` the vectors go to a memory-mapped ring buffer of
+    `capacity` rows on disk; once full the oldest steps are overwritten.
+    The number of probabilities each entry shows (kept(i)) and their running
+    total (kept_before(i)) are recorded on append, so a viewer can lay out
+    rows without decoding any entry.
+    append() and clear() hold `lock`; a reader on another thread holds it
+    too while it reads several entries, so that the ring buffer cannot
+    evict (and renumber) entries in between.
+    """
+
+    def __init__(self, dim, encoding="sparse", threshold=1e-6, top_k=64,
+                 spill_path=None, capacity=None):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"encoding must be one of {ENCODINGS}")
+        if spill_path is not None and (encoding == "sparse" or capacity is None):
+            raise ValueError("spilling to disk needs a fixed-width encoding and a capacity")
+        self.dim = dim
+        self.encoding = encoding
+        self.threshold = threshold
+        self.top_k = min(top_k, dim)
+        self.capacity = capacity
+        self.dropped = 0  # steps overwritten by the ring buffer
+        self.lock = threading.RLock()
+        self._meta = []   # (gate, targets, controls)
+        self._data = []   # (indices or None, values) when kept in memory
+        self._kept = []   # probabilities above threshold per entry
+        self._kept_start = []  # running total of _kept before each entry (never rebased)
+        self._disk = None
+        if spill_path is not None:
+            if encoding == "float32":
+                row = np.dtype((np.float32, dim))
+            else:
+                row = np.dtype([("idx", np.int64, (self.top_k,)), ("val", np.float32, (self.top_k,))])
+            self._disk = np.memmap(spill_path, dtype=row, mode="w+", shape=(capacity,))
+
+    def append(self, entry):
+        gate, probs, targets, controls = entry
+        indices, values = self._encode(np.asarray(probs).reshape(-1))
+        # counted on the encoded values, exactly as entry() filters them
+        kept = int(np.count_nonzero(values > self.threshold))
+        with self.lock:
+            if self.capacity is not None and len(self._meta) == self.capacity:
+                self._meta.pop(0)
+                if self._disk is None:
+                    self._data.pop(0)
+                self._kept.pop(0)
+                self._kept_start.pop(0)
+                self.dropped += 1
+
+            self._kept_start.append(self._kept_start[-1] + self._kept[-1] if self._kept else 0)
+            self._kept.append(kept)
+            if self._disk is None:
+                self._data.append((indices, values))
+            else:
+                row = (self.dropped + len(self._meta)) % self.capacity
+                if indices is None:
+                    self._disk[row] = values
+                else:
+                    self._disk[row] = (indices, values)
+            self._meta.append((gate, targets, controls))
+
+    def _encode(self, probs):
+        if self.encoding == "float32":
+            return None, probs.astype(np.float32)
+        if self.encoding == "topk":
+            k = self.top_k
+            idx = np.sort(np.argpartition(probs, self.dim - k)[self.dim - k:])
+            return idx, probs[idx].astype(np.float32)
+        idx = np.flatnonzero(probs > self.threshold)
+        if idx.size * (idx.itemsize + 4) >= self.dim * 4:
+            return None, probs.astype(np.float32)
+        return idx, probs[idx].astype(np.float32)
+
+    def _index(self, i):
+        # accepts negative indices and raises IndexError like a list
+        return range(len(self._meta))[i]
+
+    def _stored(self, i):
+        i = self._index(i)
+        if self._disk is None:
+            return self._data[i]
+        row = self._disk[(self.dropped + i) % self.capacity]
+        if self.encoding == "float32":
+            return None, np.array(row)
+        return np.array(row["idx"]), np.array(row["val"])
+
+    def kept(self, i):
+        """Number of probabilities entry(i) returns"""
+        return self._kept[self._index(i)]
+
+    def kept_before(self, i):
+        """Total kept probabilities of the entries before i (i may be len(self))"""
+        if i == len(self._meta):
+            return self._kept_start[i - 1] + self._kept[i - 1] - self._kept_start[0] if i else 0
+        return self._kept_start[self._index(i)] - self._kept_start[0]
+
+    def meta(self, i):
+        """(gate, targets, controls) of entry i, without decoding its probabilities"""
+        return self._meta[self._index(i)]
+
+    def entry(self, i):
+        """(gate, indices, values, targets, controls) of the probabilities above threshold"""
+        i = self._index(i)
+        gate, targets, controls = self._meta[i]
+        indices, values = self._stored(i)
+        if indices is None:
+            indices = np.flatnonzero(values > self.threshold)
+            values = values[indices]
+        else:
+            keep = values > self.threshold
+            indices, values = indices[keep], values[keep]
+        return gate, indices, values, targets, controls
+
+    def probabilities(self, i):
+        """Dense float32 probability vector of entry i (zeros where nothing was kept)"""
+        indices, values = self._stored(i)
+        if indices is None:
+            return values
+        probs = np.zeros(self.dim, dtype=np.float32)
+        probs[indices] = values
+        return probs
+
+    def entries(self):
+        """Lazily yield (step, gate, indices, values, targets, controls), step counting from 0"""
+        for i in range(len(self)):
+            yield (self.dropped + i,) + self.entry(i)
+
+    @property
+    def nbytes(self):
+        if self._disk is not None:
+            return 0
+        return sum(v.nbytes + (0 if idx is None else idx.nbytes) for idx, v in self._data)
+
+    def clear(self):
+        with self.lock:
+            self._meta.clear()
+            self._data.clear()
+            self._kept.clear()
+            self._kept_start.clear()
+            self.dropped = 0
+
+    def __getitem__(self, i):
+        gate, targets, controls = self._meta[i]
+        return gate, self.probabilities(i), targets, controls
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __len__(self):
+        return len(self._meta)
+
+    def __bool__(self):
+        return len(self._meta) > 0
@@ -1,34 +1,246 @@
+import bisect
 import tkinter as tk
-from tkinter import scrolledtext
+from tkinter import messagebox, font as tkfont
+import numpy as np
 
 BG_COLOR = "#1E1E1E"
 FG_COLOR = "#FFFFFF"
 FONT_FAMILY = "Consolas"
 FONT_SIZE_NORMAL = 12
 
+WHEEL_ROWS = 3       # rows scrolled per mouse wheel notch
+DECODED_STEPS = 256  # decoded history entries kept around while scrolling
+
+
+class HistoryRows:
+    """
+    Row layout of a HistoryStore as the viewer shows it: per step a header,
+    one row per kept basis state and a blank line. Rows are located with the
+    counts the store records on append (no entry is decoded to lay them out),
+    and only the entries of the rows asked for are decoded.
+
+    `steps` restricts the rows to those steps (a filter, absolute step
+    numbers as in history.dropped + i, so entries the ring buffer evicts later
+    show as dropped instead of shifting); `basis` shows only that basis
+    state's probability under each step header. Hold history.lock around
+    calls while another thread may append.
+    """
+
+    def __init__(self, history, n_qubits, steps=None, basis=None):
+        self.history = history
+        self.n = n_qubits
+        self.steps = steps
+        self.basis = basis
+        self._decoded = {}
+        if steps is not None and basis is None:
+            sizes = np.array([2 + history.kept(i) for i in steps - history.dropped], dtype=np.int64)
+            self.starts = np.concatenate([[0], np.cumsum(sizes)])
+
+    def n_steps(self):
+        return len(self.history) if self.steps is None else len(self.steps)
+
+    def _entry_index(self, j):
+        """Entry index of the j-th step shown; negative once the ring buffer dropped it"""
+        return j if self.steps is None else int(self.steps[j]) - self.history.dropped
+
+    def _start(self, j):
+        """First row of the j-th step shown"""
+        if self.basis is not None:
+            return 3 * j
+        if self.steps is None:
+            return 2 * j + self.history.kept_before(j)
+        return int(self.starts[j])
+
+    def __len__(self):
+        return self._start(self.n_steps())
+
+    def locate(self, row):
+        """(j, offset): the row is line `offset` of the j-th step shown"""
+        if self.basis is not None:
+            return row // 3, row % 3
+        if self.steps is None:
+            j = bisect.bisect_right(range(self.n_steps()), row, key=self._start) - 1
+        else:
+            j = int(np.searchsorted(self.starts, row, side="right")) - 1
+        return j, row - self._start(j)
+
+    def _entry(self, i):
+        step = self.history.dropped + i
+        if step not in self._decoded:
+            if len(self._decoded) >= DECODED_STEPS:
+                self._decoded.clear()
+            self._decoded[step] = self.history.entry(i)
+        return self._decoded[step]
+
+    def lines(self, first, count):
+        """Text of rows first .. first+count-1"""
+        out = []
+        total = len(self)
+        if first >= total:
+            return out
+        j, offset = self.locate(first)
+        while len(out) < count and j < self.n_steps():
+            i = self._entry_index(j)
+            size = self._start(j + 1) - self._start(j)
+            for o in range(offset, size):
+                if len(out) == count:
+                    break
+                out.append(self.line(i, o, size))
+            j, offset = j + 1, 0
+        return out
+
+    def line(self, i, offset, size):
+        if i < 0:
+            return f"Step {self.history.dropped + i + 1}: dropped from history" if offset == 0 else ""
+        if offset == 0:
+            gate, targets, controls = self.history.meta(i)
+            return f"Step {self.history.dropped + i + 1}: Gate {gate}, Targets={targets}, Controls={controls}"
+        if offset == size - 1:
+            return ""
+        _, indices, values, _, _ = self._entry(i)
+        if self.basis is not None:
+            k = np.searchsorted(indices, self.basis)  # kept indices are sorted
+            p = values[k] if k < indices.size and indices[k] == self.basis else 0.0
+            return f"   |{self.basis:0{self.n}b}> : {p:.4f}"
+        return f"   |{indices[offset - 1]:0{self.n}b}> : {values[offset - 1]:.4f}"
+
+
+def matching_steps(history, gate=None, qubit=None):
+    """Steps (history.dropped + i) whose gate is `gate` and/or that act on `qubit` (targets or controls)"""
+    steps = []
+    for i in range(len(history)):
+        g, targets, controls = history.meta(i)
+        if gate is not None and g != gate:
+            continue
+        if qubit is not None and qubit not in targets and qubit not in controls:
+            continue
+        steps.append(history.dropped + i)
+    return np.array(steps, dtype=np.int64)
+
+
+class HistoryViewer:
+    """
+    Virtualized history window: the text widget only ever holds the rows
+    that fit in it. Scrolling re-renders those rows from HistoryRows, so
+    opening and scrolling cost the same for 10 steps or 10^5 steps of a
+    16-qubit session. The rows of an unfiltered view follow the history
+    live as the circuit advances; the history lock is held while rows are
+    laid out and rendered, so the simulation thread cannot evict entries
+    in the middle of a render.
+    """
+
+    def __init__(self, root, circuit):
+        self.circuit = circuit
+        self.rows = HistoryRows(circuit.history, circuit.n)
+        self.first = 0
+
+        self.window = tk.Toplevel(root)
+        self.window.title("History of Probabilities")
+        self.window.configure(bg=BG_COLOR)
+
+        # Filter bar
+        bar = tk.Frame(self.window, bg=BG_COLOR)
+        bar.pack(fill="x", padx=10, pady=(10, 0))
+        self.filters = {}
+        for name, width in [("Gate", 8), ("Qubit", 4), ("Basis", 12)]:
+            tk.Label(bar, text=name, bg=BG_COLOR, fg=FG_COLOR).pack(side="left")
+            entry = tk.Entry(bar, width=width)
+            entry.pack(side="left", padx=(2, 8))
+            entry.bind("<Return>", lambda e: self.apply_filter())
+            self.filters[name] = entry
+        tk.Button(bar, text="Filter", command=self.apply_filter).pack(side="left")
+        tk.Button(bar, text="Clear", command=self.clear_filter).pack(side="left", padx=5)
+        self.info = tk.Label(bar, bg=BG_COLOR, fg=FG_COLOR)
+        self.info.pack(side="right")
+
+        # Text area with a scrollbar that scrolls rows, not the widget contents
+        body = tk.Frame(self.window, bg=BG_COLOR)
+        body.pack(padx=10, pady=10, fill="both", expand=True)
+        self.font = tkfont.Font(family=FONT_FAMILY, size=FONT_SIZE_NORMAL)
+        self.text = tk.Text(body, wrap="none", width=80, height=25, bg=BG_COLOR, fg=FG_COLOR, font=self.font)
+        self.scrollbar = tk.Scrollbar(body, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.text.pack(side="left", fill="both", expand=True)
+        self.text.bind("<Configure>", lambda e: self.render())
+        for widget in (self.text, self.scrollbar):
+            widget.bind("<MouseWheel>", self.on_wheel)
+            widget.bind("<Button-4>", lambda e: self.scroll_to(self.first - WHEEL_ROWS))
+            widget.bind("<Button-5>", lambda e: self.scroll_to(self.first + WHEEL_ROWS))
+        self.render()
+
+    def visible_rows(self):
+        height = self.text.winfo_height()
+        if height <= 1:  # not mapped yet
+            return int(self.text.cget("height"))
+        return max(1, height // self.font.metrics("linespace"))
+
+    def render(self):
+        visible = self.visible_rows()
+        with self.circuit.history.lock:
+            total = len(self.rows)
+            self.first = max(0, min(self.first, total - visible))
+            lines = self.rows.lines(self.first, visible)
+            n_steps = self.rows.n_steps()
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.configure(state="disabled")
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.info.config(text=f"{n_steps} steps, {total} rows")
+
+    def scroll_to(self, row):
+        self.first = row
+        self.render()
+
+    def on_scrollbar(self, action, *args):
+        if action == "moveto":
+            with self.circuit.history.lock:
+                total = len(self.rows)
+            self.scroll_to(int(float(args[0]) * total))
+        elif action == "scroll":
+            amount = int(args[0]) * (self.visible_rows() if args[1] == "pages" else 1)
+            self.scroll_to(self.first + amount)
+
+    def on_wheel(self, event):
+        self.scroll_to(self.first - WHEEL_ROWS * (1 if event.delta > 0 else -1))
+
+    def apply_filter(self):
+        gate = self.filters["Gate"].get().strip().upper() or None
+        qubit = self.filters["Qubit"].get().strip()
+        basis = self.filters["Basis"].get().strip()
+        n = self.circuit.n
+        try:
+            qubit = int(qubit) if qubit else None
+            if qubit is not None and not 0 <= qubit < n:
+                raise ValueError(f"qubit must be between 0 and {n - 1}")
+            if basis:
+                if len(basis) != n or set(basis) - {"0", "1"}:
+                    raise ValueError(f"basis state must be {n} bits, e.g. {'0' * n}")
+                basis = int(basis, 2)
+            else:
+                basis = None
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self.window)
+            return
+        history = self.circuit.history
+        with history.lock:
+            steps = None if gate is None and qubit is None else matching_steps(history, gate, qubit)
+            self.rows = HistoryRows(history, n, steps, basis)
+        self.scroll_to(0)
+
+    def clear_filter(self):
+        for entry in self.filters.values():
+            entry.delete(0, tk.END)
+        self.rows = HistoryRows(self.circuit.history, self.circuit.n)
+        self.scroll_to(0)
+
+
 def show_history(root, circuit):
     """Open a scrollable history viewer for gate applications."""
     if not circuit.history:
-        tk.messagebox.showinfo("Info", "No history yet. Apply some gates first.")
+        messagebox.showinfo("Info", "No history yet. Apply some gates first.")
         return
-
-    hist_window = tk.Toplevel(root)
-    hist_window.title("History of Probabilities")
-    hist_window.configure(bg=BG_COLOR)
-
-    text_area = scrolledtext.ScrolledText(
-        hist_window, wrap=tk.WORD, width=80, height=25,
-        bg=BG_COLOR, fg=FG_COLOR, font=(FONT_FAMILY, FONT_SIZE_NORMAL)
-    )
-    text_area.pack(padx=10, pady=10, fill="both", expand=True)
-
-    for step, (gate, probs, targets, controls) in enumerate(circuit.history):
-        n = circuit.n
-        labels = [format(i, f'0{n}b') for i in range(len(probs))]
-        text_area.insert(tk.END, f"Step {step+1}: Gate {gate}, Targets={targets}, Controls={controls}\n")
-        for l, p in zip(labels, probs):
-            if p > 1e-6:  # only show significant probabilities
-                text_area.insert(tk.END, f"   |{l}> : {p:.4f}\n")
-        text_area.insert(tk.END, "\n")
-
-    text_area.configure(state="disabled")
+    return HistoryViewer(root, circuit)
@@ -1,10 +1,11 @@
 import numpy as np
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-from Basic_1 import zero_state, apply_single_qubit_gate, cnot_on_n_qubits, toffoli_on_n_qubits, H, X, Y, Z
+from Basic_1 import zero_state, precision_dtype, apply_named_gate
+from checkpoints import CheckpointStore, CheckpointedCircuit
+from parallel import ParallelExecutor
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import random
 
 CELL_WIDTH = 80
 CELL_HEIGHT = 50
@@ -15,13 +16,20 @@ TEXT_COLOR = "black"
 GATE_SPACING = 30
 
 
-class Circuit:
-    def __init__(self, n_qubits):
+class Circuit(CheckpointedCircuit):
+    def __init__(self, n_qubits, backend="kernel", workers=1, precision=None):
         self.n = n_qubits
-        self.state = zero_state(n_qubits)
+        self.backend = backend  # "kernel" (matrix-free), "dense" or "sparse" (cached operators)
+        self.fuse_block_qubits = 1  # largest gate block apply_gates fuses
+        self.executor = ParallelExecutor(workers) if workers > 1 else None  # thread pool for kernels
+        self.precision = precision  # "double", "single" or None for Basic_1's default
+        self.dtype = precision_dtype(precision)
+        self.state = zero_state(n_qubits, self.dtype)
         self.diagram = []  # (gate, targets, controls)
         self.step_index = -1
         self.measurements = {}  # {qubit: result}
+        self.outcomes = {}  # {MEASURE step: sampled outcome}, reused when a step is replayed
+        self.checkpoints = CheckpointStore()
 
     def add_gate(self, gate, targets, controls=[]):
         self.diagram.append((gate, targets, controls))
@@ -31,55 +39,16 @@ class Circuit:
             return
         gate, targets, controls = self.diagram[index]
 
-        if gate in ["H", "X", "Y", "Z"]:
-            self.state = apply_single_qubit_gate(
-                self.state, {"H": H, "X": X, "Y": Y, "Z": Z}[gate],
-                targets[0], self.n
-            )
+        if gate == "MEASURE":
+            self.measure_and_collapse(targets[0], index)
 
-        elif gate == "CNOT":
-            self.state = cnot_on_n_qubits(
-                control=controls[0], target=targets[0], n_qubits=self.n
-            ) @ self.state
+        else:
+            if self.executor is not None and self.backend == "kernel":
+                self.state = self.executor.apply_named_gate(self.state, gate, targets, controls, self.n)
+            else:
+                self.state = apply_named_gate(self.state, gate, targets, controls, self.n, self.backend)
 
-        elif gate == "TOFFOLI":
-            self.state = toffoli_on_n_qubits(
-                control1=controls[0], control2=controls[1],
-                target=targets[0], n_qubits=self.n
-            ) @ self.state
-
-        elif gate == "MEASURE":
-            q = targets[0]
-            probs = np.abs(self.state.flatten())**2
-            outcome = self.measure_qubit(probs, q)
-            self.measurements[q] = outcome
-            # collapse state
-            self.state = self.collapse_state(q, outcome)
-
-    def measure_qubit(self, probs, qubit):
-        """Simulate measuring one qubit"""
-        n = self.n
-        outcome_probs = [0, 0]
-        for i, p in enumerate(probs):
-            bit = (i >> (n-1-qubit)) & 1
-            outcome_probs[bit] += p
-        return 0 if random.random() < outcome_probs[0] else 1
-
-    def collapse_state(self, qubit, outcome):
-        """Collapse state vector given a measurement result"""
-        n = self.n
-        new_state = self.state.copy()
-        for i in range(len(new_state)):
-            bit = (i >> (n-1-qubit)) & 1
-            if bit != outcome:
-                new_state[i] = 0
-        norm = np.linalg.norm(new_state)
-        return new_state / norm if norm > 0 else new_state
-
-    def reset(self):
-        self.state = zero_state(self.n)
-        self.step_index = -1
-        self.measurements = {}
+        self.checkpoints.maybe_save(index, self.state, self.measurements)
 
 
 class QuantumGUI:
@@ -217,10 +186,7 @@ class QuantumGUI:
         if self.circuit.step_index < 0:
             messagebox.showinfo("Info", "At initial state.")
             return
-        self.circuit.reset()
-        for i in range(self.circuit.step_index):
-            self.circuit.apply_gate(i)
-        self.circuit.step_index -= 1
+        self.circuit.goto_step(self.circuit.step_index - 1)
         self.update_canvas()
 
     def reset_circuit(self):
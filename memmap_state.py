@@ -0,0 +1,196 @@
+# memmap_state.py
+import os
+import tempfile
+
+import numpy as np
+from Basic_1 import GATES, apply_single_qubit_gate, apply_controlled_x
+from sampler import ShotSampler
+
+DEFAULT_CHUNK_QUBITS = 22  # 2^22 complex128 amplitudes = 64 MiB per chunk
+
+
+class MemmapState:
+    """
+    n-qubit state vector stored in an np.memmap file and updated in place.
+    Gates stream over the file in chunks of 2^chunk_qubits amplitudes, so the
+    working memory is a couple of chunks no matter how large n is:
+    - qubits inside a chunk (the low chunk_qubits qubits) are handled by the
+      Basic_1 kernels on one chunk at a time
+    - qubits above the chunk pair chunk i with chunk i ^ bit and combine them
+    Chunks whose high control bits are not all 1 are skipped without reading.
+    """
+
+    def __init__(self, n_qubits, path=None, chunk_qubits=DEFAULT_CHUNK_QUBITS, dtype=complex, scratch_dir=None):
+        self.n = n_qubits
+        self.c = min(chunk_qubits, n_qubits)
+        self.chunk = 2**self.c
+        self.n_chunks = 2**(n_qubits - self.c)
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".state", dir=scratch_dir)
+            os.close(fd)
+        self.path = path
+        # mode "w+" creates a zero-filled (sparse on most filesystems) file
+        self.amps = np.memmap(path, dtype=dtype, mode="w+", shape=(2**n_qubits,))
+        self.amps[0] = 1.0
+
+    def close(self):
+        self.amps.flush()
+        del self.amps
+        if self._owns_file:
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- indexing helpers ---
+    def _is_local(self, qubit):
+        return qubit >= self.n - self.c
+
+    def _local(self, qubit):
+        return qubit - (self.n - self.c)
+
+    def _chunk_bit(self, qubit):
+        return 1 << (self.n - self.c - 1 - qubit)
+
+    def _chunk_slice(self, i):
+        return slice(i * self.chunk, (i + 1) * self.chunk)
+
+    def _chunks_with(self, high_mask, skip_bit=0):
+        """Chunk indices whose high control bits are all set (and skip_bit clear)"""
+        for i in range(self.n_chunks):
+            if i & high_mask == high_mask and not i & skip_bit:
+                yield i
+
+    def _split_controls(self, controls):
+        high_mask = 0
+        local = []
+        for q in controls:
+            if self._is_local(q):
+                local.append(self._local(q))
+            else:
+                high_mask |= self._chunk_bit(q)
+        return high_mask, local
+
+    # --- gates ---
+    def apply_single_qubit_gate(self, gate, target):
+        if self._is_local(target):
+            t = self._local(target)
+            for i in range(self.n_chunks):
+                sl = self._chunk_slice(i)
+                self.amps[sl] = apply_single_qubit_gate(np.asarray(self.amps[sl]), gate, t, self.c)
+            return
+        bit = self._chunk_bit(target)
+        for i in self._chunks_with(0, skip_bit=bit):
+            sl0, sl1 = self._chunk_slice(i), self._chunk_slice(i | bit)
+            a0, a1 = np.array(self.amps[sl0]), np.array(self.amps[sl1])
+            self.amps[sl0] = gate[0, 0] * a0 + gate[0, 1] * a1
+            self.amps[sl1] = gate[1, 0] * a0 + gate[1, 1] * a1
+
+    def apply_controlled_x(self, controls, target):
+        high_mask, local = self._split_controls(controls)
+        if self._is_local(target):
+            t = self._local(target)
+            for i in self._chunks_with(high_mask):
+                sl = self._chunk_slice(i)
+                self.amps[sl] = apply_controlled_x(np.asarray(self.amps[sl]), local, t, self.c)
+            return
+        bit = self._chunk_bit(target)
+        mask = None
+        if local:
+            idx = np.arange(self.chunk)
+            lmask = sum(1 << (self.c - 1 - q) for q in local)
+            mask = (idx & lmask) == lmask
+        for i in self._chunks_with(high_mask, skip_bit=bit):
+            sl0, sl1 = self._chunk_slice(i), self._chunk_slice(i | bit)
+            a0, a1 = np.array(self.amps[sl0]), np.array(self.amps[sl1])
+            if mask is None:
+                self.amps[sl0], self.amps[sl1] = a1, a0
+            else:
+                a0[mask], a1[mask] = a1[mask], a0[mask].copy()
+                self.amps[sl0], self.amps[sl1] = a0, a1
+
+    def apply(self, gate, targets, controls=(), rng=None):
+        """Apply one Circuit.diagram gate; returns the outcome for MEASURE"""
+        if gate in GATES:
+            self.apply_single_qubit_gate(GATES[gate], targets[0])
+        elif gate in ["CNOT", "TOFFOLI"]:
+            self.apply_controlled_x(controls, targets[0])
+        elif gate == "MEASURE":
+            return self.measure_qubit(targets[0], rng)
+        else:
+            raise ValueError(f"Unknown gate {gate}")
+
+    def run(self, diagram, rng=None):
+        """Apply a whole Circuit.diagram; returns {qubit: outcome} of the measurements"""
+        measurements = {}
+        for gate, targets, controls in diagram:
+            outcome = self.apply(gate, targets, controls, rng)
+            if outcome is not None:
+                measurements[targets[0]] = outcome
+        self.amps.flush()
+        return measurements
+
+    # --- measurement ---
+    def qubit_probabilities(self, qubit):
+        """[P(qubit=0), P(qubit=1)] accumulated chunk by chunk"""
+        p = np.zeros(2)
+        for i in range(self.n_chunks):
+            probs = np.abs(self.amps[self._chunk_slice(i)])**2
+            if self._is_local(qubit):
+                p += probs.reshape(2**self._local(qubit), 2, -1).sum(axis=(0, 2))
+            else:
+                p[1 if i & self._chunk_bit(qubit) else 0] += probs.sum()
+        return p
+
+    def measure_qubit(self, qubit, rng=None):
+        """Sample one qubit and collapse the stored state in place"""
+        rng = rng if rng is not None else np.random.default_rng()
+        p = self.qubit_probabilities(qubit)
+        outcome = int(rng.random() >= p[0] / p.sum())
+        scale = 1 / np.sqrt(p[outcome])
+        for i in range(self.n_chunks):
+            sl = self._chunk_slice(i)
+            if self._is_local(qubit):
+                block = np.array(self.amps[sl]).reshape(2**self._local(qubit), 2, -1)
+                block[:, 1 - outcome, :] = 0
+                block *= scale
+                self.amps[sl] = block.reshape(-1)
+            elif bool(i & self._chunk_bit(qubit)) == bool(outcome):
+                self.amps[sl] *= scale
+            else:
+                self.amps[sl] = 0
+        return outcome
+
+    def sparse_counts(self, n_shots, rng=None):
+        """(indices, counts) of n_shots sampled basis states: shots are split over the chunks, then sampled inside each"""
+        rng = rng if rng is not None else np.random.default_rng()
+        weights = np.array([np.sum(np.abs(self.amps[self._chunk_slice(i)])**2, dtype=np.float64)
+                            for i in range(self.n_chunks)])
+        per_chunk = rng.multinomial(n_shots, weights / weights.sum())
+        indices, counts = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for i in np.flatnonzero(per_chunk):
+            idx, cnt = ShotSampler(self.amps[self._chunk_slice(i)]).sparse_counts(int(per_chunk[i]), rng)
+            indices.append(idx + int(i) * self.chunk)
+            counts.append(cnt)
+        return np.concatenate(indices), np.concatenate(counts)
+
+    def save(self, path, probabilities=False):
+        """Write the amplitudes (or their probabilities) to a .npy file chunk by chunk"""
+        dtype = self.amps.real.dtype if probabilities else self.amps.dtype
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(2**self.n,))
+        for i in range(self.n_chunks):
+            sl = self._chunk_slice(i)
+            out[sl] = np.abs(self.amps[sl])**2 if probabilities else self.amps[sl]
+        out.flush()
+        del out
+
+    def norm(self):
+        return np.sqrt(sum(np.sum(np.abs(self.amps[self._chunk_slice(i)])**2) for i in range(self.n_chunks)))
+
+    def to_array(self):
+        """Copy into RAM as a (2^n, 1) column like Basic_1 states (only for small n)"""
+        return np.array(self.amps).reshape(-1, 1)
@@ -0,0 +1,208 @@
+# mps.py
+import numpy as np
+from Basic_1 import GATES, cnot_on_n_qubits, toffoli_on_n_qubits
+
+DEFAULT_MAX_BOND = 64
+DEFAULT_CUTOFF = 1e-12
+
+SWAP = np.array([[1, 0, 0, 0],
+                 [0, 0, 1, 0],
+                 [0, 1, 0, 0],
+                 [0, 0, 0, 1]], dtype=complex)
+CNOT_2 = cnot_on_n_qubits(0, 1, 2)              # control = first site
+TOFFOLI_3 = toffoli_on_n_qubits(0, 1, 2, 3)     # controls = first two sites
+
+
+class MPSState:
+    """
+    Matrix-product state: tensors[i] has shape (left bond, 2, right bond).
+    Bonds are capped at `max_bond` (chi) and singular values below `cutoff`
+    (relative to the largest) are dropped, so memory is O(n * chi^2).
+    Qubit 0 is the leftmost site / most significant bit, as in Basic_1.
+    Gates on non-adjacent qubits are routed with SWAPs and routed back.
+    """
+
+    def __init__(self, n_qubits, max_bond=DEFAULT_MAX_BOND, cutoff=DEFAULT_CUTOFF):
+        self.n = n_qubits
+        self.max_bond = max_bond
+        self.cutoff = cutoff
+        self.truncation_error = 0.0  # summed discarded weight
+        self.tensors = []
+        for _ in range(n_qubits):
+            t = np.zeros((1, 2, 1), dtype=complex)
+            t[0, 0, 0] = 1.0
+            self.tensors.append(t)
+
+    @property
+    def bond_dimensions(self):
+        return [t.shape[2] for t in self.tensors[:-1]]
+
+    @property
+    def nbytes(self):
+        return sum(t.nbytes for t in self.tensors)
+
+    # --- gates ---
+    def apply_single_qubit_gate(self, gate, q):
+        self.tensors[q] = np.einsum("ab,lbr->lar", gate, self.tensors[q])
+
+    def _split(self, theta, k):
+        """Split a (left, 2^k, right) block back into k site tensors with truncated SVDs"""
+        left = theta.shape[0]
+        right = theta.shape[-1]
+        sites = []
+        rest = theta.reshape(left, -1)
+        for i in range(k - 1):
+            rest = rest.reshape(left * 2, -1)
+            u, s, vh = np.linalg.svd(rest, full_matrices=False)
+            keep = max(1, min(self.max_bond, int(np.sum(s > self.cutoff * s[0]))))
+            total = np.linalg.norm(s)
+            self.truncation_error += float(np.sum(s[keep:]**2) / total**2)
+            u, s, vh = u[:, :keep], s[:keep], vh[:keep]
+            s *= total / np.linalg.norm(s)  # keep the block's norm after truncation
+            sites.append(u.reshape(left, 2, keep))
+            rest = s[:, None] * vh
+            left = keep
+        sites.append(rest.reshape(left, 2, right))
+        return sites
+
+    def apply_adjacent_gate(self, gate, first, k):
+        """Apply a 2^k x 2^k gate to the k adjacent sites starting at `first`"""
+        theta = self.tensors[first]
+        for i in range(1, k):
+            theta = np.tensordot(theta, self.tensors[first + i], axes=([-1], [0]))
+        left, right = theta.shape[0], theta.shape[-1]
+        theta = theta.reshape(left, 2**k, right)
+        theta = np.einsum("ab,lbr->lar", gate, theta)
+        self.tensors[first:first + k] = self._split(theta, k)
+
+    def swap(self, q):
+        """Swap sites q and q+1"""
+        self.apply_adjacent_gate(SWAP, q, 2)
+
+    def _route(self, qubits):
+        """
+        Bring `qubits` next to each other in the given order, starting at
+        min(qubits). Returns the list of SWAP positions used, to be undone.
+        """
+        swaps = []
+        order = list(range(self.n))  # order[site] = logical qubit on that site
+        start = min(qubits)
+        for offset, q in enumerate(qubits):
+            site = order.index(q)
+            dest = start + offset
+            step = -1 if site > dest else 1
+            while site != dest:
+                nxt = site + step
+                self.swap(min(site, nxt))
+                swaps.append(min(site, nxt))
+                order[site], order[nxt] = order[nxt], order[site]
+                site = nxt
+        return swaps, start
+
+    def apply_gate(self, gate, qubits):
+        """Apply a gate matrix to `qubits` (first = most significant), routing with SWAPs"""
+        k = len(qubits)
+        if k == 1:
+            self.apply_single_qubit_gate(gate, qubits[0])
+            return
+        swaps, start = self._route(qubits)
+        self.apply_adjacent_gate(gate, start, k)
+        for q in reversed(swaps):
+            self.swap(q)
+
+    def apply(self, gate, targets, controls=(), rng=None):
+        """Apply one Circuit.diagram gate; returns the outcome for MEASURE"""
+        if gate in GATES:
+            self.apply_single_qubit_gate(GATES[gate], targets[0])
+        elif gate == "CNOT":
+            self.apply_gate(CNOT_2, [controls[0], targets[0]])
+        elif gate == "TOFFOLI":
+            self.apply_gate(TOFFOLI_3, [controls[0], controls[1], targets[0]])
+        elif gate == "MEASURE":
+            return self.measure_qubit(targets[0], rng)
+        else:
+            raise ValueError(f"Unknown gate {gate}")
+
+    def run(self, diagram, rng=None):
+        """Apply a whole Circuit.diagram; returns {qubit: outcome} of the measurements"""
+        measurements = {}
+        for gate, targets, controls in diagram:
+            outcome = self.apply(gate, targets, controls, rng)
+            if outcome is not None:
+                measurements[targets[0]] = outcome
+        return measurements
+
+    # --- queries ---
+    def amplitude(self, bits):
+        """Amplitude of a basis state given as a bitstring or list of bits"""
+        v = np.ones(1, dtype=complex)
+        for t, b in zip(self.tensors, bits):
+            v = v @ t[:, int(b), :]
+        return v[0]
+
+    def _right_environments(self):
+        """env[i] = contraction of sites i.. with their conjugates, shape (bond, bond)"""
+        env = [None] * (self.n + 1)
+        env[self.n] = np.ones((1, 1), dtype=complex)
+        for i in range(self.n - 1, -1, -1):
+            t = self.tensors[i]
+            env[i] = np.einsum("lsr,rR,LsR->lL", t, env[i + 1], t.conj())
+        return env
+
+    def norm(self):
+        return float(np.sqrt(abs(self._right_environments()[0][0, 0])))
+
+    def marginal_probabilities(self):
+        """(n, 2) array of single-qubit outcome probabilities"""
+        env = self._right_environments()
+        probs = np.zeros((self.n, 2))
+        left = np.ones((1, 1), dtype=complex)
+        for i, t in enumerate(self.tensors):
+            for b in (0, 1):
+                probs[i, b] = np.einsum("lL,lr,rR,LR->", left, t[:, b, :], env[i + 1], t[:, b, :].conj()).real
+            left = np.einsum("lL,lsr,LsR->rR", left, t, t.conj())
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def sample(self, n_shots, rng=None):
+        """
+        Draw basis states site by site from conditional probabilities.
+        Returns an (n_shots, n) array of bits; the state is left untouched.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        env = self._right_environments()
+        bits = np.zeros((n_shots, self.n), dtype=np.int8)
+        # running left vectors, one per shot
+        left = np.ones((n_shots, 1), dtype=complex)
+        for i, t in enumerate(self.tensors):
+            branch = [left @ t[:, b, :] for b in (0, 1)]  # (shots, right)
+            p = np.stack([np.einsum("sr,rR,sR->s", v, env[i + 1], v.conj()).real for v in branch], axis=1)
+            p1 = p[:, 1] / p.sum(axis=1)
+            chosen = (rng.random(n_shots) < p1).astype(np.int8)
+            bits[:, i] = chosen
+            left = np.where(chosen[:, None] == 1, branch[1], branch[0])
+            left /= np.linalg.norm(left, axis=1, keepdims=True)
+        return bits
+
+    def measure_qubit(self, q, rng=None):
+        """Sample qubit q and collapse the MPS onto that outcome"""
+        rng = rng if rng is not None else np.random.default_rng()
+        p = self.marginal_probabilities()[q]
+        outcome = int(rng.random() >= p[0])
+        projector = np.zeros((2, 2), dtype=complex)
+        projector[outcome, outcome] = 1 / np.sqrt(p[outcome])
+        self.apply_single_qubit_gate(projector, q)
+        return outcome
+
+    def to_statevector(self):
+        """(2^n, 1) state vector like Basic_1 states (only for small n)"""
+        psi = self.tensors[0]
+        for t in self.tensors[1:]:
+            psi = np.tensordot(psi, t, axes=([-1], [0]))
+        return psi.reshape(-1, 1)
+
+
+def run_mps(diagram, n_qubits, max_bond=DEFAULT_MAX_BOND, cutoff=DEFAULT_CUTOFF, rng=None):
+    """Run a Circuit.diagram on an MPS; returns (MPSState, measurements)"""
+    state = MPSState(n_qubits, max_bond, cutoff)
+    measurements = state.run(diagram, rng)
+    return state, measurements
@@ -0,0 +1,83 @@
+# operator_cache.py
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_BUDGET_BYTES = 256 * 2**20  # 256 MiB
+
+
+class OperatorCache:
+    """
+    LRU cache of explicit gate operators keyed by (gate, targets, controls, n).
+    Entries are evicted least-recently-used first once their total size goes
+    over `max_bytes`. Operators bigger than the whole budget are built but not kept.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (operator, nbytes)
+
+    def get(self, key, build):
+        """Return the cached operator for key, calling build() on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        op = build()
+        if isinstance(op, np.ndarray):
+            # shared between callers, so nobody may modify it in place
+            op.setflags(write=False)
+        size = op.nbytes
+        if size <= self.max_bytes:
+            self._entries[key] = (op, size)
+            self.current_bytes += size
+            self._evict()
+        return op
+
+    def set_budget(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Process-wide cache used by the operator builders in Basic_1
+operator_cache = OperatorCache()
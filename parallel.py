@@ -0,0 +1,91 @@
+# parallel.py
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from Basic_1 import GATES, apply_single_qubit_gate, apply_controlled_x, match_precision
+
+MIN_PARALLEL_QUBITS = 14  # below this the thread hand-off costs more than the gate
+
+
+class ParallelExecutor:
+    """
+    Applies gates with a thread pool. The amplitude array is split into blocks
+    that share no target or control bit, so blocks are independent and each
+    worker runs a plain NumPy kernel on its own block (NumPy releases the GIL
+    inside those kernels).
+    """
+
+    def __init__(self, workers=None, min_parallel_qubits=MIN_PARALLEL_QUBITS):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel_qubits = min_parallel_qubits
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def _run(self, tasks):
+        for f in [self.pool.submit(t) for t in tasks]:
+            f.result()
+
+    def _ranges(self, size):
+        """Split range(size) into about one contiguous piece per worker"""
+        bounds = np.linspace(0, size, min(self.workers, size) + 1).astype(int)
+        return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    def apply_single_qubit_gate(self, state, gate, target_qubit, n_qubits):
+        if n_qubits < self.min_parallel_qubits or self.workers == 1:
+            return apply_single_qubit_gate(state, gate, target_qubit, n_qubits)
+        gate = match_precision(gate, state)
+        psi = state.reshape(-1, 2, 2**(n_qubits - target_qubit - 1))
+        out = np.empty_like(psi)
+        left, _, right = psi.shape
+        if right == 1:
+            gate_t = gate.T
+            tasks = [lambda a=a, b=b: np.matmul(psi[a:b, :, 0], gate_t, out=out[a:b, :, 0])
+                     for a, b in self._ranges(left)]
+        elif left >= self.workers:
+            tasks = [lambda a=a, b=b: np.matmul(gate, psi[a:b], out=out[a:b])
+                     for a, b in self._ranges(left)]
+        else:
+            tasks = [lambda a=a, b=b: np.matmul(gate, psi[:, :, a:b], out=out[:, :, a:b])
+                     for a, b in self._ranges(right)]
+        self._run(tasks)
+        return out.reshape(state.shape)
+
+    def apply_controlled_x(self, state, controls, target, n_qubits):
+        if n_qubits < self.min_parallel_qubits or self.workers == 1:
+            return apply_controlled_x(state, controls, target, n_qubits)
+        out = np.empty_like(state)
+        src_flat, dst_flat = state.reshape(-1), out.reshape(-1)
+        self._run([lambda a=a, b=b: np.copyto(dst_flat[a:b], src_flat[a:b])
+                   for a, b in self._ranges(src_flat.size)])
+
+        # fix the leading free qubits to split the swap into independent blocks
+        free = [q for q in range(n_qubits) if q != target and q not in controls]
+        split = free[:max(0, min(len(free), int(np.ceil(np.log2(self.workers)))))]
+        src = state.reshape((2,) * n_qubits)
+        dst = out.reshape((2,) * n_qubits)
+
+        def swap(bits):
+            idx0 = [slice(None)] * n_qubits
+            for c in controls:
+                idx0[c] = 1
+            for q, b in zip(split, bits):
+                idx0[q] = b
+            idx1 = list(idx0)
+            idx0[target] = 0
+            idx1[target] = 1
+            dst[tuple(idx0)] = src[tuple(idx1)]
+            dst[tuple(idx1)] = src[tuple(idx0)]
+
+        self._run([lambda bits=bits: swap(bits) for bits in itertools.product((0, 1), repeat=len(split))])
+        return out
+
+    def apply_named_gate(self, state, gate, targets, controls, n_qubits):
+        if gate in GATES:
+            return self.apply_single_qubit_gate(state, GATES[gate], targets[0], n_qubits)
+        elif gate in ["CNOT", "TOFFOLI"]:
+            return self.apply_controlled_x(state, controls, targets[0], n_qubits)
+        raise ValueError(f"Unknown gate {gate}")
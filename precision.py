@@ -0,0 +1,102 @@
+# precision.py
+"""
+Accuracy report for single-precision (complex64) simulation.
+
+    python precision.py --qubits 16 --depth 200 --seed 0
+
+Runs the same circuit in double and single precision and compares the final
+states: fidelity |<psi_64|psi_128>|^2, norm drift, largest probability error,
+total variation distance, plus time and state memory of both runs.
+Measurements in the single-precision run reuse the double-precision outcomes,
+so both runs follow the same branch.
+"""
+import argparse
+import time
+
+import numpy as np
+from Basic_1 import zero_state, apply_named_gate, collapse_to_outcome, marginal_probabilities, PRECISIONS
+
+
+def random_diagram(n_qubits, depth, rng, measure_every=0, toffoli=True):
+    """
+    Random Circuit.diagram of H/X/Y/Z, CNOT and TOFFOLI (plus a MEASURE every
+    `measure_every` steps); toffoli=False keeps it Clifford.
+    """
+    diagram = []
+    for step in range(1, depth + 1):
+        if measure_every and step % measure_every == 0:
+            diagram.append(("MEASURE", [int(rng.integers(n_qubits))], []))
+            continue
+        kind = rng.integers(3) if n_qubits >= 3 and toffoli else rng.integers(2)
+        if kind == 0 or n_qubits < 2:
+            diagram.append((str(rng.choice(["H", "X", "Y", "Z"])), [int(rng.integers(n_qubits))], []))
+        elif kind == 1:
+            c, t = rng.choice(n_qubits, 2, replace=False)
+            diagram.append(("CNOT", [int(t)], [int(c)]))
+        else:
+            c1, c2, t = rng.choice(n_qubits, 3, replace=False)
+            diagram.append(("TOFFOLI", [int(t)], [int(c1), int(c2)]))
+    return diagram
+
+
+def run_diagram(diagram, n_qubits, precision, outcomes=None, rng=None):
+    """Run a diagram from |0...0>; returns (state, {step: outcome}, seconds)"""
+    rng = rng if rng is not None else np.random.default_rng()
+    outcomes = dict(outcomes or {})
+    state = zero_state(n_qubits, PRECISIONS[precision])
+    t0 = time.perf_counter()
+    for step, (gate, targets, controls) in enumerate(diagram):
+        if gate == "MEASURE":
+            q = targets[0]
+            if step not in outcomes:
+                p = marginal_probabilities(state, [q], n_qubits).astype(float)
+                outcomes[step] = int(rng.random() >= p[0] / p.sum())
+            state = collapse_to_outcome(state, [q], [outcomes[step]], n_qubits)
+        else:
+            state = apply_named_gate(state, gate, targets, controls, n_qubits)
+    return state, outcomes, time.perf_counter() - t0
+
+
+def precision_report(diagram, n_qubits, rng=None):
+    """Compare a single-precision run of `diagram` with the double-precision one"""
+    double, outcomes, t_double = run_diagram(diagram, n_qubits, "double", rng=rng)
+    single, _, t_single = run_diagram(diagram, n_qubits, "single", outcomes)
+    ref = double.reshape(-1)
+    approx = single.reshape(-1).astype(np.complex128)
+    p_ref = np.abs(ref)**2
+    p_approx = np.abs(approx)**2
+    # both states normalized, so rounding in the double run cannot push it above 1
+    overlap = abs(np.vdot(approx, ref))**2 / (np.vdot(approx, approx).real * np.vdot(ref, ref).real)
+    fidelity = float(min(1.0, max(0.0, overlap)))
+    return {
+        "qubits": n_qubits,
+        "gates": len(diagram),
+        "fidelity": fidelity,
+        "infidelity": 1 - fidelity,
+        "norm_drift": float(abs(np.linalg.norm(approx) - 1)),
+        "max_prob_error": float(np.abs(p_approx - p_ref).max()),
+        "total_variation": float(0.5 * np.abs(p_approx - p_ref).sum()),
+        "seconds_double": t_double,
+        "seconds_single": t_single,
+        "bytes_double": double.nbytes,
+        "bytes_single": single.nbytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qubits", type=int, default=12)
+    parser.add_argument("--depth", type=int, default=200)
+    parser.add_argument("--measure-every", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    diagram = random_diagram(args.qubits, args.depth, rng, args.measure_every)
+    report = precision_report(diagram, args.qubits, rng)
+    for key, value in report.items():
+        print(f"{key:>16}: {value:.3e}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# profiler.py
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_MAX_EVENTS = 100000
+
+
+class Profiler:
+    """
+    Records timed spans (wall time, net allocations, optional extra fields) for
+    the Circuit and QuantumGUI methods decorated with @profiled. Spans nest:
+    a GUI action is a depth-0 span and the simulation and redraw calls it makes
+    are its children. With trace_allocations=True, tracemalloc is running and
+    each span also records the bytes allocated (net) while it ran and, for
+    depth-0 spans, the peak. Nesting is tracked per thread, so spans from the
+    simulation worker thread are separate actions. Only the last `max_events`
+    spans are kept.
+
+    tracemalloc is process-wide: alloc_bytes also counts what other threads
+    allocated meanwhile, and its peak can only be reset for everyone. Peaks
+    are therefore only reset and recorded on the thread that created the
+    Profiler (the Tk thread); spans on other threads get no peak_bytes.
+    """
+
+    def __init__(self, trace_allocations=False, max_events=DEFAULT_MAX_EVENTS):
+        self.enabled = True
+        self.trace_allocations = trace_allocations
+        self.events = deque(maxlen=max_events)
+        self._local = threading.local()  # .depth of the current thread
+        self._peak_thread = threading.get_ident()  # the only thread that resets/records peaks
+        self._t0 = time.perf_counter()
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """Time the body; the yielded dict can be filled with extra fields for the event"""
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        record_peak = depth == 0 and threading.get_ident() == self._peak_thread
+        if self.trace_allocations:
+            if record_peak:
+                tracemalloc.reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            self._local.depth = depth
+            event = {"name": name, "cat": category, "depth": depth, "tid": threading.get_ident(),
+                     "start": start - self._t0, "duration": end - start, "args": args}
+            if self.trace_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                args["alloc_bytes"] = current - mem_before
+                if record_peak:
+                    args["peak_bytes"] = peak
+            self.events.append(event)
+
+    def clear(self):
+        self.events.clear()
+
+    def last_action(self, tid=None):
+        """The most recent depth-0 span of thread `tid` (default: this one) and the spans nested in it"""
+        tid = threading.get_ident() if tid is None else tid
+        events = [e for e in list(self.events) if e["tid"] == tid]
+        roots = [i for i, e in enumerate(events) if e["depth"] == 0]
+        if not roots:
+            return None, []
+        first = roots[-2] + 1 if len(roots) > 1 else 0
+        return events[roots[-1]], events[first:roots[-1]]
+
+    def breakdown(self, tid=None):
+        """
+        {category: seconds} of the last action, each span counted without the
+        spans nested in it (so a canvas redraw that also redraws the plot is
+        split between the two), plus "total".
+        """
+        root, children = self.last_action(tid)
+        if root is None:
+            return {}
+        totals = {}
+        nested = {}  # depth -> time of the finished spans one level below
+        # spans are recorded when they end, so children always come before their parent
+        for e in children + [root]:
+            d = e["depth"]
+            own = e["duration"] - nested.pop(d + 1, 0.0)
+            nested[d] = nested.get(d, 0.0) + e["duration"]
+            totals[e["cat"]] = totals.get(e["cat"], 0.0) + own
+        totals["total"] = root["duration"]
+        return totals
+
+    def chrome_trace(self):
+        """Events in the Chrome trace format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        return {"traceEvents": [
+            {"name": e["name"], "cat": e["cat"], "ph": "X", "pid": pid, "tid": e["tid"],
+             "ts": e["start"] * 1e6, "dur": e["duration"] * 1e6, "args": e["args"]}
+            for e in list(self.events)  # a snapshot: other threads keep recording
+        ], "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# Decorator for methods of objects with a `profiler` attribute (None = not profiled)
+def profiled(category, after=None):
+    """
+    Wrap a method in a Profiler span named after it. `after(self, *args)` may
+    return extra fields (e.g. the state size) to record once the method has run.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = getattr(self, "profiler", None)
+            if profiler is None or not profiler.enabled:
+                return method(self, *args, **kwargs)
+            with profiler.span(method.__name__, category) as fields:
+                result = method(self, *args, **kwargs)
+                if after is not None:
+                    fields.update(after(self, *args, **kwargs))
+                return result
+        return wrapper
+    return decorate
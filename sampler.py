@@ -0,0 +1,67 @@
+# sampler.py
+import numpy as np
+
+DEFAULT_CHUNK_SHOTS = 2**20
+
+
+class ShotSampler:
+    """
+    Draws computational-basis outcomes (as integer indices) from a state.
+    The cumulative distribution is built once, so repeated calls on the same
+    state only pay a binary search per shot. Large shot counts are drawn in
+    chunks of `chunk_size` so memory stays bounded.
+    """
+
+    def __init__(self, state, chunk_size=DEFAULT_CHUNK_SHOTS):
+        probs = np.abs(np.asarray(state).reshape(-1))**2
+        self.dim = probs.size
+        self.n_qubits = int(np.log2(self.dim))
+        # accumulated in float64 even for complex64 states: a float32 running sum
+        # over 2^n entries drifts far more than the probabilities themselves
+        self.cdf = np.cumsum(probs, dtype=np.float64)
+        self.cdf /= self.cdf[-1]
+        self.chunk_size = chunk_size
+
+    def sample(self, n_shots, rng=None):
+        """Return an array of n_shots sampled basis-state indices"""
+        rng = rng if rng is not None else np.random.default_rng()
+        idx = np.searchsorted(self.cdf, rng.random(n_shots), side="right")
+        # guard against the last cdf entry rounding just below 1.0
+        return np.minimum(idx, self.dim - 1)
+
+    def counts(self, n_shots, rng=None):
+        """np.bincount-style array: counts[i] = number of shots that gave basis state i"""
+        rng = rng if rng is not None else np.random.default_rng()
+        counts = np.zeros(self.dim, dtype=np.int64)
+        for size in self._chunks(n_shots):
+            counts += np.bincount(self.sample(size, rng), minlength=self.dim)
+        return counts
+
+    def sparse_counts(self, n_shots, rng=None):
+        """(indices, counts) of the outcomes that occurred, without a 2^n array"""
+        rng = rng if rng is not None else np.random.default_rng()
+        indices = np.empty(0, dtype=np.int64)
+        counts = np.empty(0, dtype=np.int64)
+        for size in self._chunks(n_shots):
+            idx, cnt = np.unique(self.sample(size, rng), return_counts=True)
+            indices, inverse = np.unique(np.concatenate([indices, idx]), return_inverse=True)
+            counts = np.bincount(inverse, weights=np.concatenate([counts, cnt]), minlength=indices.size).astype(np.int64)
+        return indices, counts
+
+    def _chunks(self, n_shots):
+        while n_shots > 0:
+            size = min(n_shots, self.chunk_size)
+            yield size
+            n_shots -= size
+
+
+# Bitstring view of a counts array (or of (indices, counts) from sparse_counts)
+def counts_to_dict(counts, n_qubits, indices=None):
+    if indices is None:
+        indices = np.flatnonzero(counts)
+        counts = counts[indices]
+    return {format(int(i), f'0{n_qubits}b'): int(c) for i, c in zip(indices, counts)}
+
+
+def sample_counts(state, n_shots, rng=None, chunk_size=DEFAULT_CHUNK_SHOTS):
+    return ShotSampler(state, chunk_size).counts(n_shots, rng)
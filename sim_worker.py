@@ -0,0 +1,139 @@
+# sim_worker.py
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+PROGRESS_INTERVAL = 0.1  # seconds between progress messages
+
+
+class SimulationWorker:
+    """
+    Moves a Circuit to requested steps on a background thread so the Tk
+    thread only renders. Requests go through a queue:
+    - rapid requests are coalesced, only the newest target is simulated
+    - a new request cancels the move in progress at the next gate (or replay
+      segment) boundary; the circuit is left at a consistent earlier step
+    - a gate that raises is reported as an "error" event; the worker carries on
+    - set_circuit() closes the circuit it replaces (its kernel thread pool) once
+      the worker has switched, so no gate of the old circuit is still running
+    - results come back through `events`, which the GUI polls with root.after:
+      ("progress", step, target), ("done", step, seq) or ("error", message, seq)
+    Requests are numbered; a "done" or "error" whose seq equals `submitted`
+    answers the newest request, and the worker is idle until the next one.
+    While `busy` the worker may be changing the circuit, so the GUI thread
+    must not read its state, measurements or tableau.
+    """
+
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.requests = queue.Queue()
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._last_progress = 0.0
+        self.submitted = 0  # number of requests made so far (GUI thread only)
+        self.answered = 0   # seq of the last request answered (worker thread only)
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self.thread.start()
+
+    # --- called from the GUI thread ---
+    def goto(self, step):
+        self._submit(("goto", step))
+
+    def reset(self):
+        self._submit(("reset", None))
+
+    @property
+    def busy(self):
+        """True until the newest request is answered; read from the GUI thread"""
+        return self.answered != self.submitted
+
+    def set_circuit(self, circuit):
+        self._submit(("circuit", circuit))
+
+    def stop(self):
+        self._submit(None)
+
+    def _submit(self, request):
+        self.submitted += 1
+        self._cancel.set()
+        self.requests.put((self.submitted, request))
+
+    # --- worker thread ---
+    def _take_requests(self):
+        """
+        Block for a request, then fold everything queued behind it into one goto.
+        Returns (running, target step or None, seq of the last request folded in).
+        """
+        pending = [self.requests.get()]
+        self._cancel.clear()  # requests arriving from now on cancel this round
+        while True:
+            try:
+                pending.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        target = None
+        for seq, request in pending:
+            if request is None:
+                return False, None, seq
+            kind, value = request
+            if kind == "goto":
+                target = value
+            elif kind == "reset":
+                self.circuit.reset()
+                target = -1
+            elif kind == "circuit":
+                if value is not self.circuit:
+                    self.circuit.close()
+                self.circuit = value
+                target = value.step_index
+        return True, target, seq
+
+    def _run(self):
+        while True:
+            running, target, seq = self._take_requests()
+            if not running:
+                return
+            if target is None:
+                continue
+            # one span per round, so the profiler sees a move as a single worker action
+            profiler = self.circuit.profiler
+            span = profiler.span("goto", "simulation", target=target) if profiler else nullcontext()
+            try:
+                with span:
+                    finished = self._goto(target)
+            except Exception as e:
+                # e.g. a TOFFOLI after a tableau run too wide to turn into a state vector;
+                # whatever it is, report it and keep serving requests
+                message = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+                self._answer(("error", message, seq))
+                continue
+            if finished:
+                self._answer(("done", self.circuit.step_index, seq))
+
+    def _answer(self, event):
+        # mark the request answered before the GUI can see the event
+        self.answered = event[-1]
+        self.events.put(event)
+
+    def _progress(self, step, target):
+        """Post progress now and then; returns False once the move should stop"""
+        now = time.perf_counter()
+        if now - self._last_progress > PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.events.put(("progress", step, target))
+        return not self._cancel.is_set()
+
+    def _goto(self, target):
+        circuit = self.circuit
+        target = min(target, len(circuit.diagram) - 1)
+        if target > circuit.step_index:
+            # forward one gate at a time, as Next always did, so history is recorded
+            while circuit.step_index < target:
+                if not self._progress(circuit.step_index, target):
+                    return False
+                circuit.apply_gate(circuit.step_index + 1)
+                circuit.step_index += 1
+        elif target < circuit.step_index:
+            circuit.goto_step(target, progress=self._progress)
+        return circuit.step_index == target
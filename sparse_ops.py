@@ -0,0 +1,92 @@
+# sparse_ops.py
+import numpy as np
+
+
+class SparseOperator:
+    """
+    n-qubit operator stored with a fixed number k of nonzeros per row:
+        (U @ state)[i] = sum_j values[j, i] * state[columns[j, i]]
+    Every gate in Basic_1 fits in k=1 (permutation + phase: X, Y, Z, CNOT,
+    TOFFOLI) or k=2 (H), so storage is O(k * 2^n) instead of O(4^n).
+    """
+
+    def __init__(self, columns, values):
+        self.columns = columns  # (k, dim) integer array
+        self.values = values    # (k, dim) complex array
+
+    @property
+    def dim(self):
+        return self.columns.shape[1]
+
+    @property
+    def shape(self):
+        return (self.dim, self.dim)
+
+    @property
+    def nbytes(self):
+        return self.columns.nbytes + self.values.nbytes
+
+    def __matmul__(self, state):
+        flat = state.reshape(self.dim, -1)
+        out = self.values[0][:, None] * flat[self.columns[0]]
+        for cols, vals in zip(self.columns[1:], self.values[1:]):
+            out += vals[:, None] * flat[cols]
+        return out.reshape(state.shape)
+
+    def to_dense(self):
+        U = np.zeros(self.shape, dtype=self.values.dtype)
+        rows = np.arange(self.dim)
+        for cols, vals in zip(self.columns, self.values):
+            U[rows, cols] += vals
+        return U
+
+    def to_scipy(self):
+        """Return the operator as a scipy.sparse CSR matrix (needs scipy)"""
+        from scipy.sparse import csr_matrix
+        rows = np.broadcast_to(np.arange(self.dim), self.columns.shape)
+        return csr_matrix((self.values.ravel(), (rows.ravel(), self.columns.ravel())), shape=self.shape)
+
+
+def _index_array(n_qubits):
+    # int32 indices halve the column storage whenever they fit
+    return np.arange(2**n_qubits, dtype=np.int32 if n_qubits < 31 else np.int64)
+
+
+# Sparse version of Basic_1.gate_on_n_qubits (qubit 0 = leftmost / most significant)
+def sparse_gate_on_n_qubits(gate, target_qubit, n_qubits):
+    idx = _index_array(n_qubits)
+    bit = 1 << (n_qubits - 1 - target_qubit)
+    row_bit = ((idx & bit) != 0).astype(np.intp)
+    with_0 = idx & ~bit
+    with_1 = idx | bit
+
+    nonzero = gate != 0
+    if np.all(nonzero.sum(axis=1) == 1):
+        # permutation + phase: each output amplitude reads a single input
+        src_bit = np.argmax(nonzero, axis=1)[row_bit]
+        columns = np.where(src_bit == 1, with_1, with_0)[None]
+        values = gate[row_bit, src_bit][None]
+    else:
+        columns = np.stack([with_0, with_1])
+        values = np.stack([gate[row_bit, 0], gate[row_bit, 1]])
+    return SparseOperator(columns, values)
+
+
+# Sparse multi-controlled X: a pure permutation of the basis states
+def sparse_controlled_x(controls, target, n_qubits):
+    idx = _index_array(n_qubits)
+    cmask = 0
+    for c in controls:
+        cmask |= 1 << (n_qubits - 1 - c)
+    flip = (idx & cmask) == cmask
+    # the permutation is its own inverse, so row i reads column perm[i]
+    perm = np.where(flip, idx ^ (1 << (n_qubits - 1 - target)), idx)
+    return SparseOperator(perm[None], np.ones((1, idx.size), dtype=complex))
+
+
+def sparse_cnot_on_n_qubits(control, target, n_qubits):
+    return sparse_controlled_x([control], target, n_qubits)
+
+
+def sparse_toffoli_on_n_qubits(control1, control2, target, n_qubits):
+    return sparse_controlled_x([control1, control2], target, n_qubits)
@@ -0,0 +1,265 @@
+# stabilizer.py
+import numpy as np
+
+CLIFFORD_GATES = ["H", "X", "Y", "Z", "CNOT", "MEASURE"]
+MAX_STATEVECTOR_QUBITS = 24  # largest tableau that to_statevector will expand
+
+
+def is_clifford(diagram):
+    return all(gate in CLIFFORD_GATES for gate, _, _ in diagram)
+
+
+class StabilizerState:
+    """
+    CHP stabilizer tableau (Aaronson & Gottesman 2004) for Clifford circuits.
+    Rows 0..n-1 are destabilizers, rows n..2n-1 stabilizers, row 2n is
+    scratch space. Row i is the Pauli (-1)^r[i] * prod_j X^x[i,j] Z^z[i,j]
+    with x=z=1 meaning Y. Gates update whole columns at once, so a gate is
+    O(n) and a measurement O(n^2), instead of O(2^n) for a state vector.
+    Qubit 0 is the most significant bit, as in Basic_1.
+    The single-qubit <X>, <Y>, <Z> of all qubits come from a few matrix
+    products (expectations()) and are cached until the next gate or measurement.
+    """
+
+    def __init__(self, n_qubits):
+        self.n = n_qubits
+        self.x = np.zeros((2 * n_qubits + 1, n_qubits), dtype=bool)
+        self.z = np.zeros((2 * n_qubits + 1, n_qubits), dtype=bool)
+        self.r = np.zeros(2 * n_qubits + 1, dtype=bool)
+        diag = np.arange(n_qubits)
+        self.x[diag, diag] = True               # destabilizers X_j
+        self.z[n_qubits + diag, diag] = True    # stabilizers Z_j  -> |0...0>
+        self._vector = None
+        self._cache = {}  # <P> of every qubit per basis and the z.x parities; cleared with _vector
+
+    def copy(self):
+        other = StabilizerState.__new__(StabilizerState)
+        other.n = self.n
+        other.x, other.z, other.r = self.x.copy(), self.z.copy(), self.r.copy()
+        other._vector = self._vector
+        other._cache = dict(self._cache)
+        return other
+
+    @property
+    def nbytes(self):
+        return self.x.nbytes + self.z.nbytes + self.r.nbytes
+
+    # --- gates ---
+    def h(self, a):
+        self._vector = None
+        self._cache = {}
+        self.r ^= self.x[:, a] & self.z[:, a]
+        self.x[:, a], self.z[:, a] = self.z[:, a].copy(), self.x[:, a].copy()
+
+    def s(self, a):
+        self._vector = None
+        self._cache = {}
+        self.r ^= self.x[:, a] & self.z[:, a]
+        self.z[:, a] ^= self.x[:, a]
+
+    def pauli_x(self, a):
+        self._vector = None
+        self._cache = {}
+        self.r ^= self.z[:, a]
+
+    def pauli_z(self, a):
+        self._vector = None
+        self._cache = {}
+        self.r ^= self.x[:, a]
+
+    def pauli_y(self, a):
+        self._vector = None
+        self._cache = {}
+        self.r ^= self.x[:, a] ^ self.z[:, a]
+
+    def cnot(self, control, target):
+        self._vector = None
+        self._cache = {}
+        xa, za = self.x[:, control], self.z[:, control]
+        xb, zb = self.x[:, target], self.z[:, target]
+        self.r ^= xa & zb & ~(xb ^ za)
+        self.x[:, target] ^= xa
+        self.z[:, control] ^= zb
+
+    def apply(self, gate, targets, controls=()):
+        """Apply one unitary Circuit.diagram gate (all of them are self-inverse)"""
+        if gate == "H":
+            self.h(targets[0])
+        elif gate == "X":
+            self.pauli_x(targets[0])
+        elif gate == "Y":
+            self.pauli_y(targets[0])
+        elif gate == "Z":
+            self.pauli_z(targets[0])
+        elif gate == "CNOT":
+            self.cnot(controls[0], targets[0])
+        else:
+            raise ValueError(f"{gate} is not a Clifford gate")
+
+    # --- measurement ---
+    def _rowsum(self, h, i):
+        """Replace rows h (index array) by row_h * row_i, tracking the sign"""
+        x1, z1 = self.x[i], self.z[i]
+        x2, z2 = self.x[h], self.z[h]
+        # exponent of i picked up per qubit when multiplying the two Paulis
+        g = np.where(x1 & z1, z2.astype(int) - x2,
+            np.where(x1, z2 * (2 * x2.astype(int) - 1),
+            np.where(z1, x2 * (1 - 2 * z2.astype(int)), 0)))
+        total = 2 * self.r[h] + 2 * self.r[i] + g.sum(axis=-1)
+        self.r[h] = (total % 4) == 2
+        self.x[h] ^= x1
+        self.z[h] ^= z1
+
+    def _random_pivot(self, a):
+        rows = np.flatnonzero(self.x[self.n:2 * self.n, a])
+        return self.n + rows[0] if rows.size else None
+
+    def _deterministic_outcome(self, a):
+        scratch = 2 * self.n
+        self.x[scratch] = False
+        self.z[scratch] = False
+        self.r[scratch] = False
+        for i in np.flatnonzero(self.x[:self.n, a]):
+            self._rowsum(np.array([scratch]), i + self.n)
+        return int(self.r[scratch])
+
+    def probability_of_one(self, a):
+        """P(qubit a = 1) without disturbing the state: 0, 0.5 or 1"""
+        if self._random_pivot(a) is not None:
+            return 0.5
+        return float(self._deterministic_outcome(a))
+
+    def _product_signs(self, select, n_y):
+        """
+        Sign bit of the product of the stabilizer rows picked by each row of
+        `select` (m x n bool), for all m products at once; every product is
+        known to be a Pauli with `n_y` Y factors. Writing a row as
+        (-1)^r i^(x.z) X^x Z^z, the product in row order picks up
+        (-1)^(z_j . x_k) for every selected j < k, so the signs follow from
+        the matrix of z_j . x_k parities instead of one rowsum per factor.
+        """
+        n = self.n
+        xs, zs = self.x[n:2 * n], self.z[n:2 * n]
+        # the n^3 products run through BLAS in float32, exact while sums stay below 2^24
+        if "swaps" not in self._cache:
+            self._cache["swaps"] = np.triu(zs.astype(np.float32) @ xs.T.astype(np.float32), 1) % 2
+        c = select.astype(np.float32)
+        cross = ((c @ self._cache["swaps"]) % 2 * c).sum(axis=1).astype(np.int64)
+        own_y = (xs & zs).sum(axis=1)
+        total = select @ own_y + 2 * (select @ self.r[n:2 * n].astype(np.int64)) + 2 * cross - n_y
+        return total % 4 == 2
+
+    def expectations(self, basis="Z"):
+        """
+        <X>, <Y> or <Z> of every qubit (0 or +-1). P_a is deterministic when it
+        commutes with every stabilizer; it is then +-(the product of the
+        stabilizers whose destabilizers anticommute with P_a).
+        """
+        if basis not in self._cache:
+            n = self.n
+            dx, dz = self.x[:n], self.z[:n]
+            sx, sz = self.x[n:2 * n], self.z[n:2 * n]
+            if basis == "Z":
+                deterministic, select = ~sx.any(axis=0), dx.T
+            elif basis == "X":
+                deterministic, select = ~sz.any(axis=0), dz.T
+            elif basis == "Y":
+                deterministic, select = ~(sx ^ sz).any(axis=0), (dx ^ dz).T
+            else:
+                raise ValueError(f"basis must be X, Y or Z, got {basis}")
+            values = np.zeros(n)
+            if deterministic.any():
+                signs = self._product_signs(select[deterministic], int(basis == "Y"))
+                values[deterministic] = np.where(signs, -1.0, 1.0)
+            self._cache[basis] = values
+        return self._cache[basis]
+
+    def qubit_probabilities(self):
+        """P(qubit = 1) of every qubit in one pass: 0, 0.5 or 1"""
+        return (1 - self.expectations("Z")) / 2
+
+    def bloch_vectors(self, qubits=None):
+        """(<X>, <Y>, <Z>) of each of `qubits` (default all), shape (len, 3); each entry is 0 or +-1"""
+        qubits = list(range(self.n)) if qubits is None else list(qubits)
+        return np.stack([self.expectations(basis)[qubits] for basis in "XYZ"], axis=1)
+
+    def marginal_probabilities(self, qubits):
+        """Joint outcome distribution of `qubits` (index = outcome bits in the order given)"""
+        probs = np.zeros(2**len(qubits))
+
+        def branch(state, k, index, p):
+            if p == 0:
+                return
+            if k == len(qubits):
+                probs[index] = p
+                return
+            p1 = state.probability_of_one(qubits[k])
+            for bit, p_bit in ((0, 1 - p1), (1, p1)):
+                if p_bit > 0:
+                    child = state.copy()
+                    child.measure(qubits[k], outcome=bit)
+                    branch(child, k + 1, 2 * index + bit, p * p_bit)
+
+        branch(self, 0, 0, 1.0)
+        return probs
+
+    def measure(self, a, outcome=None, rng=None):
+        """
+        Measure qubit a in the Z basis and collapse. `outcome` forces the result
+        of a random measurement (used when replaying a recorded step).
+        """
+        self._vector = None
+        self._cache = {}
+        p = self._random_pivot(a)
+        if p is None:
+            return self._deterministic_outcome(a)
+        if outcome is None:
+            rng = rng if rng is not None else np.random.default_rng()
+            outcome = int(rng.random() < 0.5)
+        others = np.flatnonzero(self.x[:2 * self.n, a])
+        others = others[others != p]
+        if others.size:
+            self._rowsum(others, p)
+        self.x[p - self.n], self.z[p - self.n], self.r[p - self.n] = self.x[p], self.z[p], self.r[p]
+        self.x[p] = False
+        self.z[p] = False
+        self.z[p, a] = True
+        self.r[p] = bool(outcome)
+        return outcome
+
+    # --- conversion ---
+    def _apply_row(self, row, psi, idx):
+        """Apply stabilizer row `row` as an operator to the statevector psi"""
+        n = self.n
+        weights = 1 << (n - 1 - np.arange(n))
+        xmask = int(weights[self.x[row]].sum())
+        zmask = int(weights[self.z[row]].sum())
+        n_y = int(np.count_nonzero(self.x[row] & self.z[row]))
+        parity = np.zeros(idx.size, dtype=bool)
+        for q in np.flatnonzero(self.z[row]):
+            parity ^= (idx & int(weights[q])) != 0
+        phase = (-1.0 if self.r[row] else 1.0) * 1j**n_y
+        out = np.empty_like(psi)
+        out[idx ^ xmask] = phase * np.where(parity, -psi, psi)
+        return out
+
+    def to_statevector(self):
+        """(2^n, 1) statevector with the same convention as Basic_1 (global phase arbitrary)"""
+        if self._vector is not None:
+            return self._vector
+        if self.n > MAX_STATEVECTOR_QUBITS:
+            raise ValueError(f"{self.n} qubits is too many to expand into a statevector")
+        # a basis state in the support of the stabilizer state has nonzero overlap
+        probe = self.copy()
+        rng = np.random.default_rng(0)
+        bits = [probe.measure(q, rng=rng) for q in range(self.n)]
+        start = int("".join(map(str, bits)), 2) if bits else 0
+
+        idx = np.arange(2**self.n)
+        psi = np.zeros(2**self.n, dtype=complex)
+        psi[start] = 1.0
+        for row in range(self.n, 2 * self.n):
+            psi = (psi + self._apply_row(row, psi, idx)) / 2
+        psi /= np.linalg.norm(psi)
+        self._vector = psi.reshape(-1, 1)
+        return self._vector
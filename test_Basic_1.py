@@ -0,0 +1,48 @@
+# test_Basic_1.py
+import numpy as np
+import pytest
+
+import Basic_1
+from Basic_1 import apply_named_gate, apply_inverse_named_gate, reduced_density_matrices
+from precision import random_diagram
+
+N = 5
+
+
+def random_state(n, seed=0):
+    rng = np.random.default_rng(seed)
+    state = rng.normal(size=2**n) + 1j * rng.normal(size=2**n)
+    return (state / np.linalg.norm(state)).reshape(-1, 1)
+
+
+@pytest.mark.parametrize("backend", ["dense", "sparse"])
+def test_operator_backends_match_kernels(backend):
+    kernel = operator = random_state(N)
+    for gate, targets, controls in random_diagram(N, 60, np.random.default_rng(0)):
+        kernel = apply_named_gate(kernel, gate, targets, controls, N)
+        operator = np.asarray(apply_named_gate(operator, gate, targets, controls, N, backend))
+        assert np.allclose(operator, kernel), (gate, targets, controls)
+
+
+def test_inverse_undoes_gates():
+    start = random_state(N, seed=1)
+    gates = random_diagram(N, 40, np.random.default_rng(1))
+    state = start
+    for gate, targets, controls in gates:
+        state = apply_named_gate(state, gate, targets, controls, N)
+    for gate, targets, controls in reversed(gates):
+        state = apply_inverse_named_gate(state, gate, targets, controls, N)
+    assert np.allclose(state, start)
+
+
+@pytest.mark.parametrize("n", [1, 4, 9])
+def test_reduced_density_matrices_match_partial_trace(monkeypatch, n):
+    # small blocks so that 9 qubits take two levels of splitting
+    monkeypatch.setattr(Basic_1, "RDM_BLOCK_QUBITS", 3)
+    monkeypatch.setattr(Basic_1, "RDM_SPLIT_QUBITS", 2)
+    state = random_state(n, seed=n)
+    rho = reduced_density_matrices(state, n)
+    for q in range(n):
+        blocks = state.reshape(2**q, 2, -1)
+        expected = np.einsum("iaj,ibj->ab", blocks, blocks.conj())
+        assert np.allclose(rho[q], expected), q
@@ -0,0 +1,100 @@
+# test_batch_runner.py
+import json
+import os
+import re
+
+import numpy as np
+import pytest
+
+import batch_runner
+from memmap_state import MemmapState
+from precision import random_diagram
+
+GOOD = {"n_qubits": 2, "gates": [["H", [0], []], ["CNOT", [1], [0]]]}
+
+
+def write_json(tmp_path, name, circuit):
+    path = tmp_path / name
+    path.write_text(json.dumps(circuit))
+    return str(path)
+
+
+def options(tmp_path, **overrides):
+    opts = {"output": str(tmp_path / "out"), "save": "probabilities", "shots": 16, "backend": "kernel",
+            "precision": "double", "fuse": 1, "max_bond": 8}
+    opts.update(overrides)
+    return opts
+
+
+@pytest.mark.parametrize("gates, message", [
+    ([["H", [2], []]], "gate 1: qubit 2 out of range"),
+    ([["H", [0], []], ["CNOT", [1], []]], "gate 2: CNOT takes 2 qubit(s), got 1"),
+    ([["RZ", [0], []]], "gate 1: unsupported gate RZ"),
+])
+def test_json_gates_are_checked(tmp_path, gates, message):
+    path = write_json(tmp_path, "bad.json", {"n_qubits": 2, "gates": gates})
+    with pytest.raises(ValueError, match=r"bad\.json: " + re.escape(message)):
+        batch_runner.load_circuit(path)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bad_file_does_not_abort_the_batch(tmp_path, workers):
+    paths = [write_json(tmp_path, "bell.json", GOOD),
+             write_json(tmp_path, "bad.json", {"n_qubits": 2, "gates": [["X", [7], []]]}),
+             str(tmp_path / "missing.json"),
+             write_json(tmp_path, "ghz.json", {"n_qubits": 2, "gates": [["X", [1], []]]})]
+    records = batch_runner.run_batch(paths, options(tmp_path), workers=workers, seed=0)
+    assert [r["circuit"] for r in records] == paths
+    assert "qubit 7 out of range" in records[1]["error"]
+    assert records[2]["error"].startswith("FileNotFoundError")
+    for r, expected in [(records[0], [0.5, 0, 0, 0.5]), (records[3], [0, 1, 0, 0])]:
+        assert "error" not in r
+        assert np.allclose(np.load(r["output"]), expected)
+
+
+def test_main_writes_results_with_errors(tmp_path, monkeypatch, capsys):
+    good = write_json(tmp_path, "bell.json", GOOD)
+    bad = write_json(tmp_path, "bad.json", {"n_qubits": 2, "gates": [["H", [0, 1], []]]})
+    out = tmp_path / "out"
+    monkeypatch.setattr("sys.argv", ["batch_runner.py", good, bad, "--output", str(out), "--workers", "1"])
+    batch_runner.main()
+    with open(os.path.join(out, "results.json")) as f:
+        records = json.load(f)["circuits"]
+    assert records[0]["n_qubits"] == 2
+    assert records[1] == {"circuit": bad, "error": f"{bad}: gate 1: H takes 1 qubit(s), got 2"}
+    assert "bad.json: failed" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("save", ["state", "probabilities", "counts"])
+def test_memmap_backend_matches_kernel(tmp_path, save):
+    circuit = {"n_qubits": 5, "gates": random_diagram(5, 40, np.random.default_rng(0)), "shots": 4000}
+    path = write_json(tmp_path, "random.json", circuit)
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    kernel, = batch_runner.run_batch([path], options(tmp_path, save=save, output=str(tmp_path / "kernel")), seed=0)
+    memmap, = batch_runner.run_batch([path], options(tmp_path, save=save, backend="memmap",
+                                                     scratch_dir=str(scratch)), seed=0)
+    assert memmap["backend"] == "memmap"
+    assert not os.listdir(scratch)  # the state file is removed
+    if save == "counts":
+        with open(memmap["output"]) as f:
+            counts = json.load(f)
+        probs = np.load(batch_runner.run_batch([path], options(tmp_path), seed=0)[0]["output"])
+        assert sum(counts.values()) == 4000
+        assert all(probs[int(k, 2)] > 0 for k in counts)
+    else:
+        assert np.allclose(np.load(memmap["output"]), np.load(kernel["output"]))
+
+
+def test_memmap_outputs_across_chunks(tmp_path):
+    n = 6
+    with MemmapState(n, chunk_qubits=2, scratch_dir=str(tmp_path)) as state:
+        state.run(random_diagram(n, 40, np.random.default_rng(1)))
+        expected = state.to_array().reshape(-1)
+        state.save(str(tmp_path / "state.npy"))
+        state.save(str(tmp_path / "probs.npy"), probabilities=True)
+        indices, counts = state.sparse_counts(10000, np.random.default_rng(0))
+    assert np.allclose(np.load(tmp_path / "state.npy"), expected)
+    assert np.allclose(np.load(tmp_path / "probs.npy"), np.abs(expected)**2)
+    assert counts.sum() == 10000 and np.all(np.diff(indices) > 0)
+    assert np.abs(np.bincount(indices, counts, minlength=2**n) / 10000 - np.abs(expected)**2).max() < 0.03
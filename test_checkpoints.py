@@ -0,0 +1,55 @@
+# test_checkpoints.py
+import numpy as np
+import pytest
+
+import gui_version6
+import measurement_gate
+from checkpoints import CheckpointStore
+from precision import random_diagram
+
+N = 4
+
+
+@pytest.mark.parametrize("max_bytes", [None, 1])
+@pytest.mark.parametrize("module", [gui_version6, measurement_gate])
+def test_goto_step_matches_stepping_from_the_start(module, max_bytes):
+    circuit = module.Circuit(N, backend="kernel")
+    circuit.checkpoints = CheckpointStore(interval=4) if max_bytes is None else CheckpointStore(4, max_bytes)
+    circuit.diagram = random_diagram(N, 60, np.random.default_rng(0), measure_every=13)
+    # reference states, stepping forward one gate at a time (samples the measurements)
+    states = [circuit.state.copy()]
+    for step in range(len(circuit.diagram)):
+        circuit.apply_gate(step)
+        circuit.step_index = step
+        states.append(circuit.state.copy())
+    assert len(circuit.checkpoints) > 0
+
+    rng = np.random.default_rng(1)
+    for target in [-1, 59, 30, 31, 3, 58, 12, 11, 0] + list(rng.integers(-1, 60, 30)):
+        circuit.goto_step(int(target))
+        assert circuit.step_index == target
+        assert np.allclose(circuit.state, states[target + 1]), target
+
+
+def test_snapshots_stay_within_budget():
+    store = CheckpointStore(interval=2, max_bytes=4 * 8 * 16)
+    for step in range(64):
+        store.maybe_save(step, np.zeros(8, dtype=complex), {})
+    assert store.current_bytes <= store.max_bytes
+    assert store.interval > 2
+    assert all((step + 1) % store.interval == 0 for step in store.snapshots)
+
+
+def test_state_over_the_budget_is_kept_on_disk(tmp_path):
+    store = CheckpointStore(interval=2, max_bytes=16, spill_dir=tmp_path)
+    rng = np.random.default_rng(0)
+    for step in range(64):
+        state = rng.standard_normal(8) + 1j * rng.standard_normal(8)
+        store.maybe_save(step, state, {0: step % 2})
+        if (step + 1) % store.interval == 0:
+            saved = step, state
+    assert len(store) == 1
+    assert isinstance(store.snapshots[saved[0]][0], np.memmap)
+    step, state, measurements = store.nearest(63)
+    assert step == saved[0] and measurements == {0: step % 2}
+    assert type(state) is np.ndarray and np.array_equal(state, saved[1])
@@ -0,0 +1,94 @@
+# test_circuit_io.py
+import re
+
+import numpy as np
+import pytest
+
+import circuit_io
+
+DIAGRAM = [("H", [0], []), ("CNOT", [1], [0]), ("TOFFOLI", [2], [0, 1]),
+           ("X", [1], []), ("MEASURE", [2], [])]
+
+
+@pytest.mark.parametrize("suffix", [".qasm", ".qsim"])
+def test_round_trip(tmp_path, suffix):
+    path = str(tmp_path / ("circuit" + suffix))
+    circuit_io.save_circuit(path, DIAGRAM, 3)
+    assert circuit_io.load_circuit(path) == (3, DIAGRAM)
+
+
+def write_qasm(tmp_path, *gate_lines, n=3):
+    path = tmp_path / "bad.qasm"
+    path.write_text("\n".join(["OPENQASM 2.0;", f"qreg q[{n}];", *gate_lines]) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("line, message", [
+    ("h q[5];", "line 3: qubit 5 out of range"),
+    ("cx q[0];", "line 3: CNOT takes 2 qubit(s), got 1"),
+    ("h q[0],q[1];", "line 3: H takes 1 qubit(s), got 2"),
+    ("ccx q[0],q[0],q[2];", "line 3: TOFFOLI on repeated qubits"),
+    ("rz q[0];", "line 3: unsupported instruction 'rz'"),
+])
+def test_qasm_rejects_bad_gates(tmp_path, line, message):
+    path = write_qasm(tmp_path, line)
+    with pytest.raises(ValueError, match=r"bad\.qasm: " + re.escape(message)):
+        circuit_io.load_circuit(path)
+
+
+def test_qasm_gate_before_qreg(tmp_path):
+    path = tmp_path / "bad.qasm"
+    path.write_text("OPENQASM 2.0;\nh q[0];\nqreg q[3];\n")
+    with pytest.raises(ValueError, match="line 2: gate before the qreg"):
+        circuit_io.load_circuit(str(path))
+
+
+def write_qsim(tmp_path, records, n=3, n_gates=None):
+    path = tmp_path / "bad.qsim"
+    n_gates = len(records) if n_gates is None else n_gates
+    header = np.array([(circuit_io.MAGIC, circuit_io.VERSION, n, n_gates)], dtype=circuit_io.HEADER)
+    with open(path, "wb") as f:
+        header.tofile(f)
+        records.tofile(f)
+    return str(path)
+
+
+def test_qsim_truncated(tmp_path):
+    path = write_qsim(tmp_path, circuit_io.to_records(DIAGRAM), n_gates=len(DIAGRAM) + 2)
+    with pytest.raises(ValueError, match="truncated"):
+        circuit_io.load_circuit(path)
+
+
+@pytest.mark.parametrize("op, qubits, message", [
+    (0, (5, -1, -1), "record 2: invalid qubits"),   # H on qubit 5
+    (4, (1, -1, -1), "record 2: invalid qubits"),   # CNOT without a control
+    (0, (1, 2, -1), "record 2: invalid qubits"),    # H with a control
+    (5, (2, 0, 0), "record 2: invalid qubits"),     # TOFFOLI on repeated qubits
+    (9, (0, -1, -1), "record 2: unknown opcode 9"),
+])
+def test_qsim_rejects_bad_records(tmp_path, op, qubits, message):
+    records = circuit_io.to_records(DIAGRAM[:3])
+    records[1] = (op, qubits)
+    with pytest.raises(ValueError, match=rf"bad\.qsim: {message}"):
+        circuit_io.load_circuit(write_qsim(tmp_path, records))
+
+
+@pytest.mark.parametrize("text", [
+    # vectorized reader
+    "OPENQASM 2.0;\nqreg q[3];\ncreg c[3];\nh q[0];\ncx q[0],q[1];\nccx q[0],q[1],q[2];\nx q[1];\nmeasure q[2] -> c[2];\n",
+    "OPENQASM 2.0;\r\n// comment\r\nqreg q[3];\r\n\r\nh q[0];\r\ncx q[0], q[1];\r\nccx q[0],q[1],q[2];\r\nx q[1];\r\nmeasure q[2]->c[2];",
+    # line by line: indented and commented gate lines
+    "OPENQASM 2.0;\nqreg q[3];\n  h q[0];\ncx q[0],q[1]; // entangle\nccx q[0],q[1],q[2];\nx q[1];\nmeasure q[2] -> c[2];\n",
+])
+def test_qasm_layouts(tmp_path, text):
+    path = tmp_path / "circuit.qasm"
+    path.write_bytes(text.encode())
+    assert circuit_io.load_circuit(str(path)) == (3, DIAGRAM)
+
+
+def test_qasm_records_match_binary_records():
+    text = "\n".join(circuit_io.qasm_lines(DIAGRAM, 3)) + "\n"
+    n_qubits, records = circuit_io.qasm_records(text.encode())
+    assert n_qubits == 3
+    assert records.tobytes() == circuit_io.to_records(DIAGRAM).tobytes()
+    assert circuit_io.qasm_records(text.replace("h q", "  h q").encode()) is None
@@ -0,0 +1,44 @@
+# test_fusion.py
+import numpy as np
+import pytest
+
+from Basic_1 import apply_named_gate, zero_state
+from fusion import compile_diagram
+from precision import random_diagram
+
+N = 5
+
+
+def unfused(diagram, n):
+    state = zero_state(n)
+    for gate, targets, controls in diagram:
+        state = apply_named_gate(state, gate, targets, controls, n)
+    return state
+
+
+@pytest.mark.parametrize("max_block_qubits", [1, 2, 3])
+def test_fused_plan_matches_gate_by_gate(max_block_qubits):
+    diagram = random_diagram(N, 80, np.random.default_rng(0))
+    plan = compile_diagram(diagram, max_block_qubits)
+    state = zero_state(N)
+    for op in plan.ops:
+        state = op.apply(state, N)
+    assert np.allclose(state, unfused(diagram, N))
+    assert len(plan) < len(diagram)
+
+
+def test_plan_covers_every_step_in_order():
+    start = 10
+    diagram = random_diagram(N, 50, np.random.default_rng(1))
+    plan = compile_diagram(diagram, 3, start)
+    steps = [s for op in plan.ops for s in op.steps]
+    assert sorted(steps) == list(range(start, start + len(diagram)))
+    for step in steps:
+        assert step in plan.ops[plan.op_for_step(step)].steps
+
+
+def test_measurement_is_a_fusion_barrier():
+    diagram = [("H", [0], []), ("MEASURE", [0], []), ("H", [0], [])]
+    plan = compile_diagram(diagram, 2)
+    assert [op.steps for op in plan.ops] == [(0,), (1,), (2,)]
+    assert plan.ops[1].is_measurement
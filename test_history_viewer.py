@@ -0,0 +1,74 @@
+# test_history_viewer.py
+import threading
+
+import numpy as np
+
+from history_store import HistoryStore
+from history_viewer import HistoryRows, matching_steps
+
+N = 4
+GATES = ["H", "X", "CNOT", "Z"]
+
+
+def fill(history, n_steps, seed=0):
+    rng = np.random.default_rng(seed)
+    for step in range(n_steps):
+        probs = rng.random(2**N) * (rng.random(2**N) < 0.5)
+        probs /= probs.sum()
+        history.append((GATES[step % 4], probs, [step % N], []))
+
+
+def expected_lines(history, steps):
+    out = []
+    for i in steps:
+        gate, indices, values, targets, controls = history.entry(i)
+        out.append(f"Step {history.dropped + i + 1}: Gate {gate}, Targets={targets}, Controls={controls}")
+        out += [f"   |{k:0{N}b}> : {p:.4f}" for k, p in zip(indices, values)]
+        out.append("")
+    return out
+
+
+def test_rows_match_entries():
+    history = HistoryStore(2**N, capacity=8)
+    fill(history, 20)
+    rows = HistoryRows(history, N)
+    expected = expected_lines(history, range(len(history)))
+    assert len(rows) == len(expected)
+    assert rows.lines(0, len(rows)) == expected
+    assert rows.lines(5, 7) == expected[5:12]
+
+
+def test_filter_survives_eviction():
+    history = HistoryStore(2**N, capacity=8)
+    fill(history, 10)
+    steps = matching_steps(history, gate="X")
+    assert list(steps) == [5, 9]  # steps 2..9 are kept, X every 4th from step 1
+    rows = HistoryRows(history, N, steps)
+    before = rows.lines(0, len(rows))
+
+    fill(history, 4, seed=1)  # evicts steps 2..5
+    after = rows.lines(0, len(rows))
+    step_9 = expected_lines(history, [9 - history.dropped])
+    assert len(after) == len(before)
+    assert after[-len(step_9):] == step_9 == before[-len(step_9):]
+    assert after[0] == "Step 6: dropped from history"
+    assert not any(after[1:-len(step_9)])
+
+
+def test_reads_under_lock_while_appending():
+    history = HistoryStore(2**N, capacity=16)
+    fill(history, 16)
+    done = threading.Event()
+
+    def writer():
+        fill(history, 2000, seed=2)
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    rows = HistoryRows(history, N)
+    while not done.is_set():
+        with history.lock:
+            lines = rows.lines(0, len(rows))
+            assert lines == expected_lines(history, range(len(history)))
+    thread.join()
@@ -0,0 +1,42 @@
+# test_profiler.py
+import json
+import sys
+import threading
+
+from profiler import Profiler
+
+
+def test_spans_nest_per_thread():
+    profiler = Profiler()
+    with profiler.span("next", "gui"):
+        with profiler.span("apply_gate", "simulation"):
+            pass
+    root, children = profiler.last_action()
+    assert (root["name"], root["depth"]) == ("next", 0)
+    assert [(e["name"], e["depth"]) for e in children] == [("apply_gate", 1)]
+    assert set(profiler.breakdown()) == {"gui", "simulation", "total"}
+
+
+def test_export_while_another_thread_records(tmp_path):
+    profiler = Profiler(max_events=2000)
+    stop = threading.Event()
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often, as a busy worker would
+
+    def record():
+        while not stop.is_set():
+            with profiler.span("goto", "simulation"):
+                pass
+
+    thread = threading.Thread(target=record)
+    thread.start()
+    try:
+        for _ in range(20):
+            profiler.export_chrome_trace(str(tmp_path / "trace.json"))
+    finally:
+        sys.setswitchinterval(interval)
+        stop.set()
+        thread.join()
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    assert events and all(e["ph"] == "X" and e["name"] == "goto" for e in events)
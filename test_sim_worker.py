@@ -0,0 +1,102 @@
+# test_sim_worker.py
+import numpy as np
+import pytest
+
+from gui_version6 import Circuit
+from sim_worker import SimulationWorker
+
+TIMEOUT = 30  # seconds to wait for the worker's answer
+
+
+def answer(worker):
+    """The done/error event answering the newest request (progress events are skipped)"""
+    while True:
+        event = worker.events.get(timeout=TIMEOUT)
+        if event[0] != "progress" and event[-1] == worker.submitted:
+            return event
+
+
+def make_worker(n=3, gates=()):
+    circuit = Circuit(n, backend="kernel")
+    for gate, targets, controls in gates:
+        circuit.add_gate(gate, targets, controls)
+    return circuit, SimulationWorker(circuit)
+
+
+def test_steps_forward_and_back():
+    circuit, worker = make_worker(gates=[("H", [0], []), ("CNOT", [1], [0]), ("X", [2], [])])
+    try:
+        worker.goto(2)
+        assert answer(worker) == ("done", 2, worker.submitted)
+        worker.goto(0)
+        assert answer(worker)[:2] == ("done", 0)
+        expected = np.zeros(8, dtype=complex)
+        expected[[0, 4]] = 1 / np.sqrt(2)
+        assert np.allclose(circuit.state.reshape(-1), expected)
+    finally:
+        worker.stop()
+
+
+def test_coalesces_rapid_requests():
+    circuit, worker = make_worker(gates=[("H", [q % 3], []) for q in range(20)])
+    try:
+        for step in range(20):
+            worker.goto(step)
+        assert answer(worker) == ("done", 19, 20)
+        assert circuit.step_index == 19
+    finally:
+        worker.stop()
+
+
+def test_error_keeps_worker_alive():
+    # qubit 5 on a 3-qubit circuit makes the kernel raise (not a ValueError)
+    circuit, worker = make_worker(gates=[("H", [0], []), ("H", [5], []), ("X", [1], [])])
+    try:
+        worker.goto(1)
+        event = answer(worker)
+        assert event[0] == "error"
+        assert circuit.step_index == 0  # the failing gate was not counted
+        assert worker.thread.is_alive()
+
+        # later requests are still served
+        worker.reset()
+        assert answer(worker)[:2] == ("done", -1)
+        worker.goto(0)
+        assert answer(worker)[:2] == ("done", 0)
+    finally:
+        worker.stop()
+        worker.thread.join(TIMEOUT)
+    assert not worker.thread.is_alive()
+
+
+def test_set_circuit_closes_the_old_executor():
+    old = Circuit(3, backend="kernel", workers=2)
+    old.add_gate("H", [0])
+    worker = SimulationWorker(old)
+    pool = old.executor.pool
+    try:
+        worker.goto(0)
+        assert answer(worker)[:2] == ("done", 0)
+        new = Circuit(3, backend="kernel", workers=2)
+        worker.set_circuit(new)
+        assert answer(worker)[:2] == ("done", -1)
+        assert old.executor is None and new.executor is not None
+        with pytest.raises(RuntimeError):
+            pool.submit(int)  # shut down
+    finally:
+        worker.stop()
+
+
+def test_busy_until_the_newest_request_is_answered():
+    circuit, worker = make_worker(gates=[("H", [0], []), ("X", [1], [])])
+    try:
+        assert not worker.busy
+        with circuit.history.lock:  # holds the worker at its first history append
+            worker.goto(1)
+            worker.goto(0)
+            assert worker.busy
+        event = answer(worker)
+        assert event == ("done", 0, worker.submitted)
+        assert not worker.busy  # marked answered before the event was posted
+    finally:
+        worker.stop()
@@ -0,0 +1,80 @@
+# test_stabilizer.py
+import numpy as np
+
+from Basic_1 import apply_named_gate, bloch_vectors, collapse_to_outcome, marginal_probabilities, zero_state
+from precision import random_diagram
+from stabilizer import StabilizerState, is_clifford
+
+N = 5
+
+
+def same_up_to_phase(a, b):
+    return np.isclose(abs(np.vdot(a, b)), 1.0)
+
+
+def test_tableau_matches_statevector():
+    tableau = StabilizerState(N)
+    state = zero_state(N)
+    gates = random_diagram(N, 80, np.random.default_rng(0), toffoli=False)
+    assert is_clifford(gates)
+    for gate, targets, controls in gates:
+        tableau.apply(gate, targets, controls)
+        state = apply_named_gate(state, gate, targets, controls, N)
+        assert same_up_to_phase(tableau.to_statevector(), state), (gate, targets, controls)
+    assert np.allclose(tableau.bloch_vectors(), bloch_vectors(state, N))
+    qubits = [3, 0, 4]
+    assert np.allclose(tableau.marginal_probabilities(qubits), marginal_probabilities(state, qubits, N))
+    for q in range(N):
+        assert np.isclose(tableau.probability_of_one(q), marginal_probabilities(state, [q], N)[1])
+
+
+def test_measurement_collapses_like_statevector():
+    gates = random_diagram(N, 40, np.random.default_rng(1), toffoli=False)
+    tableau = StabilizerState(N)
+    state = zero_state(N)
+    for gate, targets, controls in gates:
+        tableau.apply(gate, targets, controls)
+        state = apply_named_gate(state, gate, targets, controls, N)
+    rng = np.random.default_rng(2)
+    for q in [2, 0, 4]:
+        p1 = marginal_probabilities(state, [q], N)[1]
+        outcome = tableau.measure(q, rng=rng)
+        assert p1 > 1e-12 if outcome else p1 < 1 - 1e-12
+        state = collapse_to_outcome(state, [q], [outcome], N)
+        assert same_up_to_phase(tableau.to_statevector(), state)
+
+
+def random_tableau_ops(tableau, count, rng):
+    """H, S, CNOT and measurements straight on the tableau (S is not a diagram gate)"""
+    for _ in range(count):
+        kind = rng.integers(4)
+        a, b = (int(q) for q in rng.choice(tableau.n, 2, replace=False))
+        if kind == 0:
+            tableau.h(a)
+        elif kind == 1:
+            tableau.s(a)
+        elif kind == 2:
+            tableau.cnot(a, b)
+        else:
+            tableau.measure(a, rng=rng)
+        yield
+
+
+def test_expectations_match_statevector():
+    rng = np.random.default_rng(3)
+    tableau = StabilizerState(N)
+    for _ in random_tableau_ops(tableau, 120, rng):
+        state = tableau.to_statevector()
+        assert np.allclose(tableau.bloch_vectors(), bloch_vectors(state, N))
+        assert np.allclose(tableau.qubit_probabilities(), [marginal_probabilities(state, [q], N)[1] for q in range(N)])
+
+
+def test_qubit_probabilities_match_per_qubit():
+    n = 60
+    rng = np.random.default_rng(4)
+    tableau = StabilizerState(n)
+    for i, _ in enumerate(random_tableau_ops(tableau, 600, rng)):
+        if i % 50 == 0:
+            expected = [tableau.probability_of_one(q) for q in range(n)]
+            assert np.array_equal(tableau.qubit_probabilities(), expected)
+            assert np.array_equal(tableau.copy().qubit_probabilities(), expected)